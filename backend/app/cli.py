@@ -0,0 +1,115 @@
+import argparse
+import asyncio
+from bson import ObjectId
+from sqlalchemy import select, text
+from app.config.database import init_db, close_db, session_scope
+from app.config.migrations import missing_indexes, pending_migrations
+from app.config.settings import settings
+from app.models.sql_models import User, Module, Result, UserModuleRollup, Job
+from app.repositories.job_repository import UNFINISHED_STATUSES
+from app.repositories.rollup_repository import RollupRepository
+
+async def rebuild_rollups(args):
+    async with session_scope() as db:
+        counts = await RollupRepository(db).rebuild()
+    print(f"Rebuilt {counts['user_module']} user/module rollups and {counts['module']} module rollups")
+
+async def check_indexes(args):
+    for version, description in await pending_migrations():
+        print(f"pending migration {version}: {description}")
+    missing = await missing_indexes()
+    for table, index in missing:
+        print(f"missing index {table}.{index}")
+    if not missing:
+        print("All declared indexes exist")
+
+def _sql_queries(args) -> dict:
+    page = settings.DEFAULT_PAGE_SIZE + 1
+    return {
+        "user-by-email": select(User).where(User.email == args.email),
+        "user-modules": select(Module.id, Module.title, Module.video_id, Module.created_at).where(Module.user_id == int(args.user_id)).order_by(Module.created_at, Module.id).limit(page),
+        "user-results": select(Result).where(Result.user_id == int(args.user_id)).order_by(Result.created_at, Result.id).limit(page),
+        "module-results": select(Result).where(Result.module_id == int(args.module_id)).order_by(Result.created_at, Result.id).limit(page),
+        "leaderboard": select(UserModuleRollup).where(UserModuleRollup.module_id == int(args.module_id)).order_by(UserModuleRollup.best_score.desc(), UserModuleRollup.attempts, UserModuleRollup.user_id).limit(10),
+        "unfinished-jobs": select(Job).where(Job.status.in_(UNFINISHED_STATUSES)).order_by(Job.created_at)
+    }
+
+def _mongo_queries(args) -> dict:
+    # Plans do not depend on the values, so ids that are not valid ObjectIds get a placeholder
+    user_id = ObjectId(args.user_id) if ObjectId.is_valid(args.user_id) else ObjectId()
+    module_id = ObjectId(args.module_id) if ObjectId.is_valid(args.module_id) else ObjectId()
+    page = settings.DEFAULT_PAGE_SIZE + 1
+    return {
+        "user-by-email": {"find": "users", "filter": {"email": args.email}},
+        "user-modules": {"find": "modules", "filter": {"user_id": user_id}, "sort": {"created_at": 1, "_id": 1}, "limit": page},
+        "user-results": {"find": "results", "filter": {"user_id": user_id}, "sort": {"created_at": 1, "_id": 1}, "limit": page},
+        "module-results": {"find": "results", "filter": {"module_id": module_id}, "sort": {"created_at": 1, "_id": 1}, "limit": page},
+        "leaderboard": {"find": "user_module_rollups", "filter": {"module_id": module_id}, "sort": {"best_score": -1, "attempts": 1, "user_id": 1}, "limit": 10},
+        "unfinished-jobs": {"find": "jobs", "filter": {"status": {"$in": list(UNFINISHED_STATUSES)}}, "sort": {"created_at": 1}}
+    }
+
+def _describe_plan(stage: dict, depth: int = 0) -> list[str]:
+    line = "  " * depth + stage["stage"]
+    if "indexName" in stage:
+        line += f" using {stage['indexName']}"
+    lines = [line]
+    for child in [stage.get("inputStage")] + stage.get("inputStages", []):
+        if child:
+            lines.extend(_describe_plan(child, depth + 1))
+    return lines
+
+async def explain(args):
+    names = args.query or list(QUERY_NAMES)
+    async with session_scope() as db:
+        if settings.DATABASE_TYPE == "sqlite":
+            queries = _sql_queries(args)
+            for name in names:
+                compiled = queries[name].compile(db.bind, compile_kwargs={"literal_binds": True})
+                rows = await db.execute(text(f"EXPLAIN QUERY PLAN {compiled}"))
+                print(f"{name}:")
+                for row in rows:
+                    print(f"  {row[-1]}")
+        else:
+            queries = _mongo_queries(args)
+            for name in names:
+                plan = await db.command({"explain": queries[name], "verbosity": "queryPlanner"})
+                print(f"{name}:")
+                for line in _describe_plan(plan["queryPlanner"]["winningPlan"]):
+                    print(f"  {line}")
+
+QUERY_NAMES = ("user-by-email", "user-modules", "user-results", "module-results", "leaderboard", "unfinished-jobs")
+
+async def run(args):
+    await init_db(migrate=args.migrate)
+    try:
+        await args.handler(args)
+    finally:
+        await close_db()
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description="Maintenance commands for the backend")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    rebuild = commands.add_parser("rebuild-rollups", help="Recompute analytics rollups from the results")
+    rebuild.set_defaults(handler=rebuild_rollups, migrate=True)
+
+    check = commands.add_parser("check-indexes", help="List pending migrations and declared indexes missing from the database")
+    # Reporting commands must not fix what they are asked to report on
+    check.set_defaults(handler=check_indexes, migrate=False)
+
+    plans = commands.add_parser("explain", help="Show the query plans of the hot listing and lookup queries")
+    # Not `choices=`: argparse rejects the empty default of a nargs="*" positional against them
+    plans.add_argument("query", nargs="*", help=f"Queries to explain, from {', '.join(QUERY_NAMES)} (default: all)")
+    plans.add_argument("--user-id", default="1")
+    plans.add_argument("--module-id", default="1")
+    plans.add_argument("--email", default="student@example.com")
+    plans.set_defaults(handler=explain, migrate=False)
+
+    args = parser.parse_args()
+    unknown = set(getattr(args, "query", [])) - set(QUERY_NAMES)
+    if unknown:
+        parser.error(f"unknown query: {', '.join(sorted(unknown))}")
+    asyncio.run(run(args))
+
+if __name__ == "__main__":
+    main()
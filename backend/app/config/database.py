@@ -1,6 +1,8 @@
+from contextlib import asynccontextmanager
 from .settings import settings
-from .sqlite import get_sqlite_session, init_sqlite_db
+from .sqlite import get_sqlite_session, init_sqlite_db, close_sqlite_db, async_session_maker
 from .mongo import get_mongo_db, connect_mongo, close_mongo
+from .migrations import run_migrations
 
 async def get_db():
     if settings.DATABASE_TYPE == "sqlite":
@@ -9,12 +11,30 @@ async def get_db():
     else:
         yield await get_mongo_db()
 
-async def init_db():
+@asynccontextmanager
+async def session_scope():
+    """Database handle for work that runs outside a request, such as background jobs."""
+    if settings.DATABASE_TYPE == "sqlite":
+        async with async_session_maker() as session:
+            yield session
+    else:
+        yield await get_mongo_db()
+
+async def release_connection(db):
+    """Hand a request's pooled SQLite connection back while the request waits on other work; the session reconnects on next use."""
+    if settings.DATABASE_TYPE == "sqlite":
+        await db.close()
+
+async def init_db(migrate: bool = True):
     if settings.DATABASE_TYPE == "sqlite":
         await init_sqlite_db()
     else:
         await connect_mongo()
+    if migrate:
+        await run_migrations()
 
 async def close_db():
-    if settings.DATABASE_TYPE == "mongodb":
+    if settings.DATABASE_TYPE == "sqlite":
+        await close_sqlite_db()
+    else:
         await close_mongo()
@@ -0,0 +1,137 @@
+import logging
+from datetime import datetime
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from sqlalchemy import inspect, select, text
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from .settings import settings
+from .sqlite import Base, engine
+from .mongo import get_mongo_db
+from app.models.sql_models import SchemaMigration, Job as SQLJob
+from app.repositories.rollup_repository import RollupRepository
+
+logger = logging.getLogger(__name__)
+
+# Indexes every Mongo collection should have; the names are what `missing_indexes` checks for
+MONGO_INDEXES = {
+    "users": [IndexModel([("email", ASCENDING)], unique=True, name="uq_users_email")],
+    "modules": [IndexModel([("user_id", ASCENDING), ("created_at", ASCENDING), ("_id", ASCENDING)], name="ix_modules_user_created")],
+    "results": [
+        IndexModel([("user_id", ASCENDING), ("created_at", ASCENDING), ("_id", ASCENDING)], name="ix_results_user_created"),
+        IndexModel([("module_id", ASCENDING), ("created_at", ASCENDING), ("_id", ASCENDING)], name="ix_results_module_created")
+    ],
+    "user_module_rollups": [
+        IndexModel([("user_id", ASCENDING), ("module_id", ASCENDING)], unique=True, name="uq_user_module_rollups"),
+        IndexModel([("module_id", ASCENDING), ("best_score", DESCENDING)], name="ix_user_module_rollups_module_best")
+    ],
+    "module_rollups": [IndexModel([("module_id", ASCENDING)], unique=True, name="uq_module_rollups_module")],
+    "uploads": [IndexModel([("user_id", ASCENDING), ("sha256", ASCENDING)], unique=True, name="uq_uploads_user_sha256")],
+    "jobs": [IndexModel([("status", ASCENDING), ("created_at", ASCENDING)], name="ix_jobs_status_created")],
+    "generation_cache": [
+        IndexModel([("last_used_at", DESCENDING)], name="ix_generation_cache_last_used"),
+        IndexModel([("expires_at", ASCENDING)], name="ix_generation_cache_expires")
+    ]
+}
+
+def _sqlite_create_model_indexes(sync_conn):
+    # create_all() only indexes tables it creates, so databases from before an index was declared lack it
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(sync_conn, checkfirst=True)
+
+async def _sqlite_create_indexes(conn):
+    await conn.run_sync(_sqlite_create_model_indexes)
+
+async def _mongo_create_indexes(db):
+    for collection, indexes in MONGO_INDEXES.items():
+        await db[collection].create_indexes(indexes)
+
+async def _sqlite_rebuild_rollups(conn):
+    # Joins the migration's transaction; the repository's commit leaves committing to run_migrations
+    async with AsyncSession(bind=conn) as session:
+        await RollupRepository(session).rebuild()
+
+async def _mongo_rebuild_rollups(db):
+    await RollupRepository(db).rebuild()
+
+def _sqlite_add_job_lease_columns(sync_conn):
+    # create_all() never alters existing tables
+    existing = {column["name"] for column in inspect(sync_conn).get_columns("jobs")}
+    for name in ("lease_owner", "lease_expires_at"):
+        if name not in existing:
+            column_type = SQLJob.__table__.c[name].type.compile(sync_conn.dialect)
+            sync_conn.execute(text(f"ALTER TABLE jobs ADD COLUMN {name} {column_type}"))
+
+async def _sqlite_add_job_leases(conn):
+    await conn.run_sync(_sqlite_add_job_lease_columns)
+
+async def _mongo_add_job_leases(db):
+    # Documents without a lease count as expired; nothing to backfill
+    pass
+
+# Append only: each entry runs once per database, in version order
+MIGRATIONS = [
+    (1, "Create the indexes declared on the models and the Mongo collections", _sqlite_create_indexes, _mongo_create_indexes),
+    (2, "Compute the analytics rollups from the results submitted before they existed", _sqlite_rebuild_rollups, _mongo_rebuild_rollups),
+    (3, "Add lease columns to jobs so a running job has a single owner", _sqlite_add_job_leases, _mongo_add_job_leases)
+]
+
+async def run_migrations():
+    """Apply every migration not yet recorded in schema_migrations; safe to run from several workers."""
+    if settings.DATABASE_TYPE == "sqlite":
+        async with engine.begin() as conn:
+            applied = set((await conn.execute(select(SchemaMigration.version))).scalars())
+            for version, description, sqlite_step, _ in MIGRATIONS:
+                if version in applied:
+                    continue
+                await sqlite_step(conn)
+                await conn.execute(
+                    sqlite_insert(SchemaMigration)
+                    .values(version=version, description=description, applied_at=datetime.utcnow())
+                    .on_conflict_do_nothing()
+                )
+                logger.info(f"Applied migration {version}: {description}")
+    else:
+        db = await get_mongo_db()
+        applied = {doc["_id"] async for doc in db.schema_migrations.find({}, {"_id": 1})}
+        for version, description, _, mongo_step in MIGRATIONS:
+            if version in applied:
+                continue
+            await mongo_step(db)
+            await db.schema_migrations.update_one(
+                {"_id": version},
+                {"$setOnInsert": {"description": description, "applied_at": datetime.utcnow()}},
+                upsert=True
+            )
+            logger.info(f"Applied migration {version}: {description}")
+
+async def pending_migrations() -> list[tuple[int, str]]:
+    if settings.DATABASE_TYPE == "sqlite":
+        async with engine.connect() as conn:
+            applied = set((await conn.execute(select(SchemaMigration.version))).scalars())
+    else:
+        db = await get_mongo_db()
+        applied = {doc["_id"] async for doc in db.schema_migrations.find({}, {"_id": 1})}
+    return [(version, description) for version, description, _, _ in MIGRATIONS if version not in applied]
+
+async def missing_indexes() -> list[tuple[str, str]]:
+    """(table or collection, index name) pairs that are declared but absent from the database."""
+    missing = []
+    if settings.DATABASE_TYPE == "sqlite":
+        def find_missing(sync_conn):
+            inspector = inspect(sync_conn)
+            for table in Base.metadata.sorted_tables:
+                if not inspector.has_table(table.name):
+                    missing.extend((table.name, index.name) for index in table.indexes)
+                    continue
+                existing = {index["name"] for index in inspector.get_indexes(table.name)}
+                missing.extend((table.name, index.name) for index in table.indexes if index.name not in existing)
+
+        async with engine.connect() as conn:
+            await conn.run_sync(find_missing)
+    else:
+        db = await get_mongo_db()
+        for collection, indexes in MONGO_INDEXES.items():
+            existing = set(await db[collection].index_information())
+            missing.extend((collection, index.document["name"]) for index in indexes if index.document["name"] not in existing)
+    return missing
@@ -4,15 +4,84 @@ from typing import Literal
 class Settings(BaseSettings):
     DATABASE_TYPE: Literal["sqlite", "mongodb"] = "sqlite"
     SQLITE_DB_URL: str = "sqlite+aiosqlite:///./app.db"
+    SQLITE_PRODUCTION_MODE: bool = False
+    SQLITE_READ_POOL_SIZE: int = 8
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_MMAP_SIZE: int = 256 * 1024 * 1024
+    SQLITE_CACHE_SIZE_KIB: int = 64 * 1024
     MONGO_URL: str = "mongodb://localhost:27017"
     MONGO_DB_NAME: str = "learning_platform"
     
     JWT_SECRET: str
     JWT_ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    JWT_BACKEND: Literal["jose", "pyjwt"] = "jose"
+    TOKEN_CACHE_SIZE: int = 10000
+    BCRYPT_ROUNDS: int = 12
+    # 0 = half the CPU cores
+    PASSWORD_HASH_WORKERS: int = 0
     
     GEMINI_API_KEY: str
     YOUTUBE_API_KEY: str
+    GEMINI_MODEL: str = "gemini-2.5-flash"
+    
+    HTTP2_ENABLED: bool = True
+    HTTP_MAX_CONNECTIONS: int = 100
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    HTTP_KEEPALIVE_EXPIRY: float = 30.0
+    GEMINI_TIMEOUT: float = 30.0
+    YOUTUBE_TIMEOUT: float = 10.0
+    
+    GENERATION_CACHE_ENABLED: bool = True
+    GENERATION_CACHE_MEMORY_SIZE: int = 256
+    GENERATION_CACHE_MAX_ENTRIES: int = 5000
+    GENERATION_CACHE_TTL_SECONDS: int = 7 * 24 * 3600
+    GENERATION_CHUNK_TOKENS: int = 2000
+    GENERATION_MAX_PARALLEL: int = 4
+    GENERATION_MAX_CHUNKS: int = 64
+    
+    YOUTUBE_DAILY_QUOTA: int = 10000
+    YOUTUBE_SEARCH_COST: int = 100
+    YOUTUBE_CACHE_SIZE: int = 2048
+    YOUTUBE_CACHE_TTL_SECONDS: int = 24 * 3600
+    YOUTUBE_NEGATIVE_CACHE_TTL_SECONDS: int = 3600
+    
+    MAX_UPLOAD_BYTES: int = 25 * 1024 * 1024
+    PDF_PROCESS_WORKERS: int = 0
+    PDF_MIN_PAGES_PER_TASK: int = 16
+    
+    RETRIEVAL_CHUNK_TOKENS: int = 200
+    CHATBOT_TOP_K: int = 5
+    CHATBOT_CONTEXT_TOKENS: int = 1500
+    CHATBOT_CACHE_SIZE: int = 1024
+    CHATBOT_CACHE_TTL_SECONDS: int = 24 * 3600
+    CHATBOT_CACHE_TOKEN_SET: bool = False
+    
+    ANSWER_KEY_CACHE_SIZE: int = 4096
+    ANSWER_KEY_CACHE_TTL_SECONDS: int = 3600
+    
+    RESULT_BATCH_ENABLED: bool = False
+    RESULT_BATCH_MAX_ROWS: int = 100
+    RESULT_BATCH_MAX_DELAY_MS: float = 5.0
+    
+    DEFAULT_PAGE_SIZE: int = 50
+    MAX_PAGE_SIZE: int = 200
+    
+    JOB_WORKERS: int = 2
+    JOB_EVENT_POLL_SECONDS: float = 1.0
+    JOB_LEASE_SECONDS: float = 60.0
+    SSE_KEEPALIVE_SECONDS: float = 15.0
+    
+    METRICS_ENABLED: bool = True
+    # Shared by all uvicorn workers so /metrics reports the whole server; empty for a single process
+    METRICS_MULTIPROC_DIR: str = ""
+    METRICS_SNAPSHOT_SECONDS: float = 5.0
+    
+    PROFILING_ENABLED: bool = False
+    # Requests sent with `X-Profile: <token>` are profiled; empty disables the header
+    PROFILING_ADMIN_TOKEN: str = ""
+    PROFILING_SAMPLE_RATE: float = 0.0
+    PROFILING_MAX_FILES: int = 50
     
     class Config:
         env_file = ".env"
@@ -1,11 +1,56 @@
+from sqlalchemy import event, Delete, Insert, Update
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
-from sqlalchemy.orm import declarative_base
+from sqlalchemy.orm import declarative_base, Session
 from .settings import settings
 
 Base = declarative_base()
 
-engine = create_async_engine(settings.SQLITE_DB_URL, echo=False)
-async_session_maker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+def _read_only_url(url: str):
+    """The same database file opened with mode=ro, so reader connections can never take the write lock."""
+    url = make_url(url)
+    return url.set(database=f"file:{url.database}?mode=ro", query={**url.query, "uri": "true"})
+
+def _set_pragmas(dbapi_connection, read_only: bool):
+    cursor = dbapi_connection.cursor()
+    if not read_only:
+        # Persistent for the file; readers then never block the writer and vice versa
+        cursor.execute("PRAGMA journal_mode=WAL")
+    # Safe with WAL: a power loss can only lose the last commits, never corrupt the file
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA busy_timeout={settings.SQLITE_BUSY_TIMEOUT_MS}")
+    cursor.execute(f"PRAGMA mmap_size={settings.SQLITE_MMAP_SIZE}")
+    # Negative means KiB rather than pages
+    cursor.execute(f"PRAGMA cache_size=-{settings.SQLITE_CACHE_SIZE_KIB}")
+    if read_only:
+        cursor.execute("PRAGMA query_only=ON")
+    cursor.close()
+
+if settings.SQLITE_PRODUCTION_MODE:
+    # SQLite allows one writer at a time; a one-connection pool makes writers queue here instead of failing with "database is locked"
+    engine = create_async_engine(settings.SQLITE_DB_URL, echo=False, pool_size=1, max_overflow=0)
+    read_engine = create_async_engine(_read_only_url(settings.SQLITE_DB_URL), echo=False, pool_size=settings.SQLITE_READ_POOL_SIZE, max_overflow=0)
+    event.listen(engine.sync_engine, "connect", lambda dbapi_connection, record: _set_pragmas(dbapi_connection, read_only=False))
+    event.listen(read_engine.sync_engine, "connect", lambda dbapi_connection, record: _set_pragmas(dbapi_connection, read_only=True))
+else:
+    engine = create_async_engine(settings.SQLITE_DB_URL, echo=False)
+    read_engine = engine
+
+class RoutingSession(Session):
+    """Sends flushes and INSERT/UPDATE/DELETE statements to the writer engine and everything else to the readers.
+
+    Reads inside a session do not see that session's uncommitted writes, so
+    commit before reading back what was just written.
+    """
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if self._flushing or isinstance(clause, (Insert, Update, Delete)):
+            return engine.sync_engine
+        return read_engine.sync_engine
+
+if settings.SQLITE_PRODUCTION_MODE:
+    async_session_maker = async_sessionmaker(class_=AsyncSession, sync_session_class=RoutingSession, expire_on_commit=False)
+else:
+    async_session_maker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
 async def get_sqlite_session():
     async with async_session_maker() as session:
@@ -14,3 +59,8 @@ async def get_sqlite_session():
 async def init_sqlite_db():
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+
+async def close_sqlite_db():
+    await engine.dispose()
+    if read_engine is not engine:
+        await read_engine.dispose()
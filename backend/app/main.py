@@ -1,7 +1,17 @@
+import asyncio
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from app.config.database import init_db, close_db
-from app.routes import auth_routes, upload_routes, module_routes, result_routes, chatbot_routes, test_routes
+from app.config.settings import settings
+from app.services.http_client import start_http_clients, close_http_clients
+from app.services.job_queue import job_queue
+from app.services.result_batcher import result_batcher
+from app.services.pdf_parser import start_pdf_executor, shutdown_pdf_executor
+from app.utils.auth_utils import shutdown_password_executor
+from app.services.metrics import registry, snapshot_writer, install_db_metrics, MetricsMiddleware
+from app.services.profiling import ProfilingMiddleware
+from app.routes import auth_routes, upload_routes, module_routes, result_routes, chatbot_routes, test_routes, job_routes
 
 app = FastAPI(title="Learning Platform API", version="1.0.0")
 
@@ -13,20 +23,42 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+if settings.PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
+
+if settings.METRICS_ENABLED:
+    # Outermost, so the timings include the other middleware
+    app.add_middleware(MetricsMiddleware)
+
 app.include_router(test_routes.router)
 app.include_router(auth_routes.router)
 app.include_router(upload_routes.router)
 app.include_router(module_routes.router)
 app.include_router(result_routes.router)
 app.include_router(chatbot_routes.router)
+app.include_router(job_routes.router)
 
 @app.on_event("startup")
 async def startup_event():
+    if settings.METRICS_ENABLED:
+        install_db_metrics()
+        await snapshot_writer.start()
     await init_db()
+    await start_http_clients()
+    start_pdf_executor()
+    await job_queue.start()
+    if settings.RESULT_BATCH_ENABLED:
+        await result_batcher.start()
 
 @app.on_event("shutdown")
 async def shutdown_event():
+    await result_batcher.stop()
+    await job_queue.stop()
+    shutdown_pdf_executor()
+    shutdown_password_executor()
+    await close_http_clients()
     await close_db()
+    await snapshot_writer.stop()
 
 @app.get("/")
 async def root():
@@ -35,3 +67,10 @@ async def root():
 @app.get("/health")
 async def health():
     return {"status": "healthy"}
+
+if settings.METRICS_ENABLED:
+    @app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+    async def metrics():
+        # Off the event loop: in multi-process mode this reads every worker's snapshot file
+        text = await asyncio.to_thread(registry.render)
+        return PlainTextResponse(text, media_type="text/plain; version=0.0.4")
@@ -20,6 +20,14 @@ def module_helper(module) -> dict:
         "created_at": module.get("created_at", datetime.utcnow())
     }
 
+def module_summary_helper(module) -> dict:
+    return {
+        "id": str(module["_id"]),
+        "title": module["title"],
+        "video_id": module.get("video_id"),
+        "created_at": module.get("created_at", datetime.utcnow())
+    }
+
 def result_helper(result) -> dict:
     return {
         "id": str(result["_id"]),
@@ -30,3 +38,29 @@ def result_helper(result) -> dict:
         "time_taken": result.get("time_taken"),
         "created_at": result.get("created_at", datetime.utcnow())
     }
+
+def job_helper(job) -> dict:
+    return {
+        "id": str(job["_id"]),
+        "user_id": job["user_id"],
+        "kind": job["kind"],
+        "status": job["status"],
+        "stage": job.get("stage"),
+        "progress": job.get("progress", 0),
+        "payload": job["payload"],
+        "result": job.get("result"),
+        "error": job.get("error"),
+        "lease_expires_at": job.get("lease_expires_at"),
+        "created_at": job.get("created_at", datetime.utcnow()),
+        "updated_at": job.get("updated_at", datetime.utcnow())
+    }
+
+def upload_helper(upload) -> dict:
+    return {
+        "id": str(upload["_id"]),
+        "user_id": upload["user_id"],
+        "sha256": upload["sha256"],
+        "filename": upload["filename"],
+        "size": upload["size"],
+        "created_at": upload.get("created_at", datetime.utcnow())
+    }
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, Float, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, Text, Float, ForeignKey, DateTime, UniqueConstraint, LargeBinary, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.config.sqlite import Base
@@ -17,6 +17,8 @@ class User(Base):
 
 class Module(Base):
     __tablename__ = "modules"
+    # Keyset pagination walks (created_at, id) within one user
+    __table_args__ = (Index("ix_modules_user_created", "user_id", "created_at", "id"),)
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -31,6 +33,10 @@ class Module(Base):
 
 class Result(Base):
     __tablename__ = "results"
+    __table_args__ = (
+        Index("ix_results_user_created", "user_id", "created_at", "id"),
+        Index("ix_results_module_created", "module_id", "created_at", "id")
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -42,3 +48,105 @@ class Result(Base):
     
     user = relationship("User", back_populates="results")
     module = relationship("Module", back_populates="results")
+
+class GenerationCache(Base):
+    __tablename__ = "generation_cache"
+    
+    key = Column(String, primary_key=True)
+    model = Column(String, nullable=False)
+    prompt_version = Column(String, nullable=False)
+    payload = Column(Text, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    last_used_at = Column(DateTime, default=datetime.utcnow, index=True)
+    expires_at = Column(DateTime, nullable=False)
+
+class Job(Base):
+    __tablename__ = "jobs"
+    
+    id = Column(String, primary_key=True)
+    user_id = Column(String, nullable=False, index=True)
+    kind = Column(String, nullable=False)
+    status = Column(String, nullable=False, index=True)
+    stage = Column(String)
+    progress = Column(Integer, default=0)
+    payload = Column(Text, nullable=False)
+    result = Column(Text)
+    error = Column(Text)
+    # The worker running the job and when its claim lapses unless renewed
+    lease_owner = Column(String)
+    lease_expires_at = Column(DateTime)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+class Upload(Base):
+    __tablename__ = "uploads"
+    __table_args__ = (UniqueConstraint("user_id", "sha256", name="uq_uploads_user_sha256"),)
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(String, nullable=False, index=True)
+    sha256 = Column(String, nullable=False, index=True)
+    filename = Column(String, nullable=False)
+    size = Column(Integer, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+class ModuleIndex(Base):
+    __tablename__ = "module_indexes"
+    
+    module_id = Column(Integer, ForeignKey("modules.id"), primary_key=True)
+    fingerprint = Column(String, nullable=False)
+    data = Column(LargeBinary, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+# Upper bounds (seconds) of the time-taken histogram; slower attempts land in time_gt_600
+TIME_BUCKETS = (30, 60, 120, 300, 600)
+TIME_BUCKET_COLUMNS = tuple(f"time_le_{bound}" for bound in TIME_BUCKETS) + (f"time_gt_{TIME_BUCKETS[-1]}",)
+
+class RollupColumns:
+    attempts = Column(Integer, nullable=False, default=0)
+    score_sum = Column(Float, nullable=False, default=0)
+    score_sumsq = Column(Float, nullable=False, default=0)
+    best_score = Column(Float)
+    latest_score = Column(Float)
+    latest_at = Column(DateTime)
+    time_le_30 = Column(Integer, nullable=False, default=0)
+    time_le_60 = Column(Integer, nullable=False, default=0)
+    time_le_120 = Column(Integer, nullable=False, default=0)
+    time_le_300 = Column(Integer, nullable=False, default=0)
+    time_le_600 = Column(Integer, nullable=False, default=0)
+    time_gt_600 = Column(Integer, nullable=False, default=0)
+
+class UserModuleRollup(RollupColumns, Base):
+    __tablename__ = "user_module_rollups"
+    # Leaderboards rank users within one module by best score
+    __table_args__ = (Index("ix_user_module_rollups_module_best", "module_id", "best_score"),)
+    
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    module_id = Column(Integer, ForeignKey("modules.id"), primary_key=True)
+
+class ModuleRollup(RollupColumns, Base):
+    __tablename__ = "module_rollups"
+    
+    module_id = Column(Integer, ForeignKey("modules.id"), primary_key=True)
+
+class SchemaMigration(Base):
+    __tablename__ = "schema_migrations"
+    
+    version = Column(Integer, primary_key=True)
+    description = Column(String, nullable=False)
+    applied_at = Column(DateTime, default=datetime.utcnow)
+
+class Quiz(Base):
+    __tablename__ = "quizzes"
+    
+    module_id = Column(Integer, ForeignKey("modules.id"), primary_key=True)
+    questions = Column(Text, nullable=False)
+    answer_key = Column(Text, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+class QuizQuestionStat(Base):
+    __tablename__ = "quiz_question_stats"
+    
+    module_id = Column(Integer, ForeignKey("modules.id"), primary_key=True)
+    question_index = Column(Integer, primary_key=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    correct = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,82 @@
+from sqlalchemy import select, delete, update
+from app.models.sql_models import GenerationCache as SQLGenerationCache
+from app.config.settings import settings
+from datetime import datetime, timedelta
+import json
+
+class GenerationCacheRepository:
+    def __init__(self, db):
+        self.db = db
+        self.db_type = settings.DATABASE_TYPE
+
+    async def get(self, key: str):
+        now = datetime.utcnow()
+        if self.db_type == "sqlite":
+            result = await self.db.execute(select(SQLGenerationCache).where(SQLGenerationCache.key == key))
+            entry = result.scalar_one_or_none()
+            if not entry:
+                # End the read transaction; a miss is followed by a long generation
+                await self.db.rollback()
+                return None
+            if entry.expires_at <= now:
+                await self.db.execute(delete(SQLGenerationCache).where(SQLGenerationCache.key == key))
+                await self.db.commit()
+                return None
+            await self.db.execute(update(SQLGenerationCache).where(SQLGenerationCache.key == key).values(last_used_at=now))
+            await self.db.commit()
+            return json.loads(entry.payload)
+        else:
+            entry = await self.db.generation_cache.find_one_and_update(
+                {"_id": key, "expires_at": {"$gt": now}},
+                {"$set": {"last_used_at": now}}
+            )
+            return entry["payload"] if entry else None
+
+    async def set(self, key: str, model: str, prompt_version: str, payload: dict, ttl_seconds: int):
+        now = datetime.utcnow()
+        expires_at = now + timedelta(seconds=ttl_seconds)
+        if self.db_type == "sqlite":
+            entry = SQLGenerationCache(
+                key=key,
+                model=model,
+                prompt_version=prompt_version,
+                payload=json.dumps(payload),
+                created_at=now,
+                last_used_at=now,
+                expires_at=expires_at
+            )
+            await self.db.merge(entry)
+            await self.db.commit()
+        else:
+            await self.db.generation_cache.replace_one(
+                {"_id": key},
+                {
+                    "model": model,
+                    "prompt_version": prompt_version,
+                    "payload": payload,
+                    "created_at": now,
+                    "last_used_at": now,
+                    "expires_at": expires_at
+                },
+                upsert=True
+            )
+
+    async def evict(self, max_entries: int):
+        """Drop expired entries, then the least recently used ones beyond `max_entries`."""
+        now = datetime.utcnow()
+        if self.db_type == "sqlite":
+            await self.db.execute(delete(SQLGenerationCache).where(SQLGenerationCache.expires_at <= now))
+            keep = select(SQLGenerationCache.key).order_by(SQLGenerationCache.last_used_at.desc()).limit(max_entries)
+            await self.db.execute(delete(SQLGenerationCache).where(SQLGenerationCache.key.not_in(keep)))
+            await self.db.commit()
+        else:
+            await self.db.generation_cache.delete_many({"expires_at": {"$lte": now}})
+            stale = self.db.generation_cache.find({}, {"_id": 1}).sort("last_used_at", -1).skip(max_entries)
+            stale_ids = [doc["_id"] async for doc in stale]
+            if stale_ids:
+                await self.db.generation_cache.delete_many({"_id": {"$in": stale_ids}})
+
+    async def rollback(self):
+        """Reset the session after a failed cache operation so the caller's own writes still work."""
+        if self.db_type == "sqlite":
+            await self.db.rollback()
@@ -0,0 +1,142 @@
+from sqlalchemy import select, update, or_, and_
+from app.models.sql_models import Job as SQLJob
+from app.models.mongo_models import job_helper
+from app.config.settings import settings
+from datetime import datetime, timedelta
+import json
+import uuid
+
+UNFINISHED_STATUSES = ("queued", "running")
+
+def _sql_job_to_dict(job: SQLJob) -> dict:
+    return {
+        "id": job.id,
+        "user_id": job.user_id,
+        "kind": job.kind,
+        "status": job.status,
+        "stage": job.stage,
+        "progress": job.progress,
+        "payload": json.loads(job.payload),
+        "result": json.loads(job.result) if job.result else None,
+        "error": job.error,
+        "lease_expires_at": job.lease_expires_at,
+        "created_at": job.created_at,
+        "updated_at": job.updated_at
+    }
+
+class JobRepository:
+    def __init__(self, db):
+        self.db = db
+        self.db_type = settings.DATABASE_TYPE
+
+    async def create_job(self, user_id: str, kind: str, payload: dict):
+        now = datetime.utcnow()
+        job_id = uuid.uuid4().hex
+        if self.db_type == "sqlite":
+            job = SQLJob(id=job_id, user_id=str(user_id), kind=kind, status="queued", progress=0, payload=json.dumps(payload), created_at=now, updated_at=now)
+            self.db.add(job)
+            await self.db.commit()
+            return _sql_job_to_dict(job)
+        else:
+            job_doc = {
+                "_id": job_id,
+                "user_id": str(user_id),
+                "kind": kind,
+                "status": "queued",
+                "stage": None,
+                "progress": 0,
+                "payload": payload,
+                "result": None,
+                "error": None,
+                "created_at": now,
+                "updated_at": now
+            }
+            await self.db.jobs.insert_one(job_doc)
+            return job_helper(job_doc)
+
+    async def get_job(self, job_id: str):
+        if self.db_type == "sqlite":
+            # populate_existing so polling through one session never returns stale identity-map state
+            result = await self.db.execute(select(SQLJob).where(SQLJob.id == job_id).execution_options(populate_existing=True))
+            job = result.scalar_one_or_none()
+            return _sql_job_to_dict(job) if job else None
+        else:
+            job = await self.db.jobs.find_one({"_id": job_id})
+            return job_helper(job) if job else None
+
+    async def update_job(self, job_id: str, **fields):
+        fields["updated_at"] = datetime.utcnow()
+        if self.db_type == "sqlite":
+            if "result" in fields and fields["result"] is not None:
+                fields["result"] = json.dumps(fields["result"])
+            await self.db.execute(update(SQLJob).where(SQLJob.id == job_id).values(**fields))
+            await self.db.commit()
+        else:
+            await self.db.jobs.update_one({"_id": job_id}, {"$set": fields})
+
+    def _sql_claimable(self, now: datetime):
+        return or_(SQLJob.status == "queued", and_(SQLJob.status == "running", or_(SQLJob.lease_expires_at.is_(None), SQLJob.lease_expires_at < now)))
+
+    def _mongo_claimable(self, now: datetime) -> dict:
+        # None also matches jobs saved before leases existed
+        return {"$or": [{"status": "queued"}, {"status": "running", "lease_expires_at": None}, {"status": "running", "lease_expires_at": {"$lt": now}}]}
+
+    async def claim_job(self, job_id: str, owner: str) -> bool:
+        """Atomically mark a job as running under `owner`'s lease, for JOB_LEASE_SECONDS.
+
+        Only queued jobs and running jobs whose lease expired can be claimed,
+        so a job has at most one live owner across all workers and processes.
+        Returns False when someone else holds it.
+        """
+        now = datetime.utcnow()
+        fields = {"status": "running", "lease_owner": owner, "lease_expires_at": now + timedelta(seconds=settings.JOB_LEASE_SECONDS), "updated_at": now}
+        if self.db_type == "sqlite":
+            result = await self.db.execute(update(SQLJob).where(SQLJob.id == job_id, self._sql_claimable(now)).values(**fields))
+            await self.db.commit()
+            return result.rowcount == 1
+        else:
+            result = await self.db.jobs.update_one({"_id": job_id, **self._mongo_claimable(now)}, {"$set": fields})
+            return result.modified_count == 1
+
+    async def renew_lease(self, job_id: str, owner: str) -> bool:
+        """Extend `owner`'s lease; False once the job finished or another worker took it over."""
+        now = datetime.utcnow()
+        lease_expires_at = now + timedelta(seconds=settings.JOB_LEASE_SECONDS)
+        if self.db_type == "sqlite":
+            result = await self.db.execute(
+                update(SQLJob)
+                .where(SQLJob.id == job_id, SQLJob.status == "running", SQLJob.lease_owner == owner)
+                .values(lease_expires_at=lease_expires_at)
+            )
+            await self.db.commit()
+            return result.rowcount == 1
+        else:
+            result = await self.db.jobs.update_one(
+                {"_id": job_id, "status": "running", "lease_owner": owner},
+                {"$set": {"lease_expires_at": lease_expires_at}}
+            )
+            return result.matched_count == 1
+
+    async def finish_job(self, job_id: str, owner: str, **fields) -> bool:
+        """Record a job's outcome unless `owner` has lost its lease in the meantime."""
+        fields["updated_at"] = datetime.utcnow()
+        fields["lease_expires_at"] = None
+        if self.db_type == "sqlite":
+            if "result" in fields and fields["result"] is not None:
+                fields["result"] = json.dumps(fields["result"])
+            result = await self.db.execute(update(SQLJob).where(SQLJob.id == job_id, SQLJob.lease_owner == owner).values(**fields))
+            await self.db.commit()
+            return result.rowcount == 1
+        else:
+            result = await self.db.jobs.update_one({"_id": job_id, "lease_owner": owner}, {"$set": fields})
+            return result.matched_count == 1
+
+    async def get_claimable_jobs(self):
+        """Queued jobs and running jobs whose worker stopped renewing the lease, oldest first."""
+        now = datetime.utcnow()
+        if self.db_type == "sqlite":
+            result = await self.db.execute(select(SQLJob).where(SQLJob.status.in_(UNFINISHED_STATUSES), self._sql_claimable(now)).order_by(SQLJob.created_at))
+            return [_sql_job_to_dict(j) for j in result.scalars().all()]
+        else:
+            cursor = self.db.jobs.find({"status": {"$in": list(UNFINISHED_STATUSES)}, **self._mongo_claimable(now)}).sort("created_at", 1)
+            return [job_helper(j) async for j in cursor]
@@ -0,0 +1,29 @@
+from sqlalchemy import select
+from app.models.sql_models import ModuleIndex as SQLModuleIndex
+from app.config.settings import settings
+from datetime import datetime
+
+class ModuleIndexRepository:
+    def __init__(self, db):
+        self.db = db
+        self.db_type = settings.DATABASE_TYPE
+
+    async def get_index(self, module_id: str):
+        if self.db_type == "sqlite":
+            result = await self.db.execute(select(SQLModuleIndex).where(SQLModuleIndex.module_id == int(module_id)))
+            index = result.scalar_one_or_none()
+            return {"fingerprint": index.fingerprint, "data": index.data} if index else None
+        else:
+            index = await self.db.module_indexes.find_one({"_id": str(module_id)})
+            return {"fingerprint": index["fingerprint"], "data": bytes(index["data"])} if index else None
+
+    async def save_index(self, module_id: str, fingerprint: str, data: bytes):
+        if self.db_type == "sqlite":
+            await self.db.merge(SQLModuleIndex(module_id=int(module_id), fingerprint=fingerprint, data=data, created_at=datetime.utcnow()))
+            await self.db.commit()
+        else:
+            await self.db.module_indexes.replace_one(
+                {"_id": str(module_id)},
+                {"fingerprint": fingerprint, "data": data, "created_at": datetime.utcnow()},
+                upsert=True
+            )
@@ -1,9 +1,16 @@
 from sqlalchemy import select
 from app.models.sql_models import Module as SQLModule
-from app.models.mongo_models import module_helper
+from app.models.mongo_models import module_helper, module_summary_helper
 from app.config.settings import settings
+from app.services.chatbot_service import index_module
+from app.utils.pagination import make_page, sql_after, mongo_after
 from bson import ObjectId
 from datetime import datetime
+import logging
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_PROJECTION = {"title": 1, "video_id": 1, "created_at": 1}
 
 class ModuleRepository:
     def __init__(self, db):
@@ -16,7 +23,7 @@ class ModuleRepository:
             self.db.add(module)
             await self.db.commit()
             await self.db.refresh(module)
-            return {"id": str(module.id), "user_id": str(module.user_id), "title": module.title, "content": module.content, "pdf_text": module.pdf_text, "video_id": module.video_id, "created_at": module.created_at}
+            new_module = {"id": str(module.id), "user_id": str(module.user_id), "title": module.title, "content": module.content, "pdf_text": module.pdf_text, "video_id": module.video_id, "created_at": module.created_at}
         else:
             module_doc = {
                 "user_id": ObjectId(user_id),
@@ -28,7 +35,17 @@ class ModuleRepository:
             }
             result = await self.db.modules.insert_one(module_doc)
             module_doc["_id"] = result.inserted_id
-            return module_helper(module_doc)
+            new_module = module_helper(module_doc)
+        
+        # Index now so the first chatbot question does not pay for it; a failure here only defers that
+        try:
+            await index_module(new_module, self.db)
+        except Exception as e:
+            logger.warning(f"Failed to index module {new_module['id']}: {str(e)}")
+            # The module is committed; reset the session so the caller can keep using it
+            if self.db_type == "sqlite":
+                await self.db.rollback()
+        return new_module
     
     async def get_module_by_id(self, module_id: str):
         if self.db_type == "sqlite":
@@ -41,12 +58,31 @@ class ModuleRepository:
             module = await self.db.modules.find_one({"_id": ObjectId(module_id)})
             return module_helper(module) if module else None
     
-    async def get_user_modules(self, user_id: str):
+    async def module_exists(self, module_id: str) -> bool:
+        if self.db_type == "sqlite":
+            result = await self.db.execute(select(SQLModule.id).where(SQLModule.id == int(module_id)))
+            return result.scalar_one_or_none() is not None
+        else:
+            return await self.db.modules.find_one({"_id": ObjectId(module_id)}, {"_id": 1}) is not None
+    
+    async def get_user_modules(self, user_id: str, after: str = None, limit: int = None):
+        """One page of a user's module summaries, oldest first; pass the returned `next_cursor` as `after` to continue.
+
+        Summaries leave out `content` and `pdf_text`, which are never read
+        from the database here; use `get_module_by_id` for the full module.
+        """
+        limit = limit or settings.DEFAULT_PAGE_SIZE
         if self.db_type == "sqlite":
-            result = await self.db.execute(select(SQLModule).where(SQLModule.user_id == int(user_id)))
-            modules = result.scalars().all()
-            return [{"id": str(m.id), "user_id": str(m.user_id), "title": m.title, "content": m.content, "pdf_text": m.pdf_text, "video_id": m.video_id, "created_at": m.created_at} for m in modules]
+            query = select(SQLModule.id, SQLModule.title, SQLModule.video_id, SQLModule.created_at).where(SQLModule.user_id == int(user_id))
+            if after:
+                query = query.where(sql_after(SQLModule.created_at, SQLModule.id, after))
+            result = await self.db.execute(query.order_by(SQLModule.created_at, SQLModule.id).limit(limit + 1))
+            modules = result.all()
+            return make_page([{"id": str(m.id), "title": m.title, "video_id": m.video_id, "created_at": m.created_at} for m in modules], limit)
         else:
-            cursor = self.db.modules.find({"user_id": ObjectId(user_id)})
-            modules = await cursor.to_list(length=100)
-            return [module_helper(m) for m in modules]
+            query = {"user_id": ObjectId(user_id)}
+            if after:
+                query.update(mongo_after(after))
+            cursor = self.db.modules.find(query, SUMMARY_PROJECTION).sort([("created_at", 1), ("_id", 1)]).limit(limit + 1)
+            modules = await cursor.to_list(length=limit + 1)
+            return make_page([module_summary_helper(m) for m in modules], limit)
@@ -0,0 +1,65 @@
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from app.models.sql_models import Quiz as SQLQuiz, QuizQuestionStat as SQLQuizQuestionStat
+from app.config.settings import settings
+from datetime import datetime
+import json
+
+class QuizRepository:
+    def __init__(self, db):
+        self.db = db
+        self.db_type = settings.DATABASE_TYPE
+
+    async def save_quiz(self, module_id: str, questions: list[dict], answer_key: list[int]):
+        """Store a module's quiz; `questions` hold question and options only, the answers live in `answer_key`."""
+        if self.db_type == "sqlite":
+            await self.db.merge(SQLQuiz(module_id=int(module_id), questions=json.dumps(questions), answer_key=json.dumps(answer_key), created_at=datetime.utcnow()))
+            await self.db.commit()
+        else:
+            await self.db.quizzes.replace_one(
+                {"_id": str(module_id)},
+                {"questions": questions, "answer_key": answer_key, "stats": [{"attempts": 0, "correct": 0} for _ in answer_key], "created_at": datetime.utcnow()},
+                upsert=True
+            )
+
+    async def get_quiz(self, module_id: str):
+        if self.db_type == "sqlite":
+            result = await self.db.execute(select(SQLQuiz).where(SQLQuiz.module_id == int(module_id)))
+            quiz = result.scalar_one_or_none()
+            return {"module_id": str(quiz.module_id), "questions": json.loads(quiz.questions), "answer_key": json.loads(quiz.answer_key)} if quiz else None
+        else:
+            quiz = await self.db.quizzes.find_one({"_id": str(module_id)}, {"stats": 0})
+            return {"module_id": quiz["_id"], "questions": quiz["questions"], "answer_key": quiz["answer_key"]} if quiz else None
+
+    async def record_answers(self, module_id: str, attempts: int, correct_counts: list[int]):
+        """Add `attempts` graded submissions with `correct_counts[i]` right answers to question i.
+
+        Does not commit on SQLite; the caller's transaction does.
+        """
+        if self.db_type == "sqlite":
+            # Core insert on the table (an executemany), not the ORM bulk path, so get_bind() sees the statement
+            table = SQLQuizQuestionStat.__table__
+            stmt = sqlite_insert(table)
+            await self.db.execute(
+                stmt.on_conflict_do_update(
+                    index_elements=["module_id", "question_index"],
+                    set_={"attempts": table.c.attempts + stmt.excluded.attempts, "correct": table.c.correct + stmt.excluded.correct}
+                ),
+                [{"module_id": int(module_id), "question_index": i, "attempts": attempts, "correct": int(c)} for i, c in enumerate(correct_counts)]
+            )
+        else:
+            increments = {}
+            for i, c in enumerate(correct_counts):
+                increments[f"stats.{i}.attempts"] = attempts
+                increments[f"stats.{i}.correct"] = int(c)
+            await self.db.quizzes.update_one({"_id": str(module_id)}, {"$inc": increments})
+
+    async def get_question_stats(self, module_id: str) -> list[dict]:
+        if self.db_type == "sqlite":
+            result = await self.db.execute(
+                select(SQLQuizQuestionStat).where(SQLQuizQuestionStat.module_id == int(module_id)).order_by(SQLQuizQuestionStat.question_index)
+            )
+            return [{"question_index": s.question_index, "attempts": s.attempts, "correct": s.correct} for s in result.scalars().all()]
+        else:
+            quiz = await self.db.quizzes.find_one({"_id": str(module_id)}, {"stats": 1})
+            return [{"question_index": i, **s} for i, s in enumerate(quiz.get("stats", []))] if quiz else []
@@ -1,51 +1,104 @@
-from sqlalchemy import select
+from sqlalchemy import select, insert
 from app.models.sql_models import Result as SQLResult
 from app.models.mongo_models import result_helper
+from app.repositories.rollup_repository import RollupRepository
+from app.repositories.quiz_repository import QuizRepository
 from app.config.settings import settings
+from app.utils.pagination import make_page, sql_after, mongo_after
 from bson import ObjectId
 from datetime import datetime
+import numpy as np
+
+RESULT_COLUMNS = (SQLResult.id, SQLResult.user_id, SQLResult.module_id, SQLResult.score, SQLResult.total_questions, SQLResult.time_taken, SQLResult.created_at)
 
 class ResultRepository:
     def __init__(self, db):
         self.db = db
         self.db_type = settings.DATABASE_TYPE
     
-    async def create_result(self, user_id: str, module_id: str, score: float, total_questions: int, time_taken: int = None):
+    async def create_result(self, user_id: str, module_id: str, score: float, total_questions: int, time_taken: int = None, correct: list[bool] = None):
+        rows = await self.create_results([{"user_id": user_id, "module_id": module_id, "score": score, "total_questions": total_questions, "time_taken": time_taken, "correct": correct}])
+        return rows[0]
+    
+    async def create_results(self, rows: list[dict]) -> list[dict]:
+        """Insert several results in one transaction and return them in the same order.
+
+        Each row has the `create_result` arguments as keys. The rollups and,
+        for rows carrying per-question `correct` flags, the quiz question
+        statistics are updated in the same transaction on SQLite.
+        """
+        now = datetime.utcnow()
         if self.db_type == "sqlite":
-            result = SQLResult(user_id=int(user_id), module_id=int(module_id), score=score, total_questions=total_questions, time_taken=time_taken)
-            self.db.add(result)
+            params = [{"user_id": int(r["user_id"]), "module_id": int(r["module_id"]), "score": r["score"], "total_questions": r["total_questions"], "time_taken": r.get("time_taken"), "created_at": now} for r in rows]
+            # RETURNING hands back ids and defaults without a refresh() round trip per row. A Core insert on the
+            # table, not the ORM bulk path, so the statement itself reaches get_bind() and is routed to the writer
+            inserted = await self.db.execute(
+                insert(SQLResult.__table__).returning(*RESULT_COLUMNS, sort_by_parameter_order=True),
+                params
+            )
+            results = [{"id": str(r.id), "user_id": str(r.user_id), "module_id": str(r.module_id), "score": r.score, "total_questions": r.total_questions, "time_taken": r.time_taken, "created_at": r.created_at} for r in inserted.all()]
+            rollups = RollupRepository(self.db)
+            for result in results:
+                await rollups.record_result(result["user_id"], result["module_id"], result["score"], result["time_taken"], result["created_at"])
+            await self._record_question_stats(rows)
+            # Same transaction as the inserts, so the rollups can never disagree with the results table
             await self.db.commit()
-            await self.db.refresh(result)
-            return {"id": str(result.id), "user_id": str(result.user_id), "module_id": str(result.module_id), "score": result.score, "total_questions": result.total_questions, "time_taken": result.time_taken, "created_at": result.created_at}
+            return results
         else:
-            result_doc = {
-                "user_id": ObjectId(user_id),
-                "module_id": ObjectId(module_id),
-                "score": score,
-                "total_questions": total_questions,
-                "time_taken": time_taken,
-                "created_at": datetime.utcnow()
-            }
-            result = await self.db.results.insert_one(result_doc)
-            result_doc["_id"] = result.inserted_id
-            return result_helper(result_doc)
+            result_docs = [{
+                "user_id": ObjectId(r["user_id"]),
+                "module_id": ObjectId(r["module_id"]),
+                "score": r["score"],
+                "total_questions": r["total_questions"],
+                "time_taken": r.get("time_taken"),
+                "created_at": now
+            } for r in rows]
+            # insert_many fills in each document's _id
+            await self.db.results.insert_many(result_docs, ordered=True)
+            rollups = RollupRepository(self.db)
+            for doc in result_docs:
+                await rollups.record_result(str(doc["user_id"]), str(doc["module_id"]), doc["score"], doc["time_taken"], doc["created_at"])
+            await self._record_question_stats(rows)
+            return [result_helper(doc) for doc in result_docs]
     
-    async def get_user_results(self, user_id: str):
+    async def _record_question_stats(self, rows: list[dict]):
+        by_module = {}
+        for row in rows:
+            if row.get("correct") is not None:
+                by_module.setdefault(str(row["module_id"]), []).append(row["correct"])
+        quizzes = QuizRepository(self.db)
+        for module_id, correct in by_module.items():
+            # One upsert per module and question for the whole batch
+            await quizzes.record_answers(module_id, len(correct), np.sum(correct, axis=0).tolist())
+    
+    async def get_user_results(self, user_id: str, after: str = None, limit: int = None):
+        """One page of a user's results, oldest first; pass the returned `next_cursor` as `after` to continue."""
+        limit = limit or settings.DEFAULT_PAGE_SIZE
         if self.db_type == "sqlite":
-            result = await self.db.execute(select(SQLResult).where(SQLResult.user_id == int(user_id)))
-            results = result.scalars().all()
-            return [{"id": str(r.id), "user_id": str(r.user_id), "module_id": str(r.module_id), "score": r.score, "total_questions": r.total_questions, "time_taken": r.time_taken, "created_at": r.created_at} for r in results]
+            return await self._sql_page(SQLResult.user_id == int(user_id), after, limit)
         else:
-            cursor = self.db.results.find({"user_id": ObjectId(user_id)})
-            results = await cursor.to_list(length=100)
-            return [result_helper(r) for r in results]
+            return await self._mongo_page({"user_id": ObjectId(user_id)}, after, limit)
     
-    async def get_module_results(self, module_id: str):
+    async def get_module_results(self, module_id: str, after: str = None, limit: int = None):
+        """One page of a module's results, oldest first; pass the returned `next_cursor` as `after` to continue."""
+        limit = limit or settings.DEFAULT_PAGE_SIZE
         if self.db_type == "sqlite":
-            result = await self.db.execute(select(SQLResult).where(SQLResult.module_id == int(module_id)))
-            results = result.scalars().all()
-            return [{"id": str(r.id), "user_id": str(r.user_id), "module_id": str(r.module_id), "score": r.score, "total_questions": r.total_questions, "time_taken": r.time_taken, "created_at": r.created_at} for r in results]
+            return await self._sql_page(SQLResult.module_id == int(module_id), after, limit)
         else:
-            cursor = self.db.results.find({"module_id": ObjectId(module_id)})
-            results = await cursor.to_list(length=100)
-            return [result_helper(r) for r in results]
+            return await self._mongo_page({"module_id": ObjectId(module_id)}, after, limit)
+    
+    async def _sql_page(self, condition, after: str, limit: int):
+        # Plain column rows: no ORM objects or identity-map bookkeeping for rows that only become JSON
+        query = select(*RESULT_COLUMNS).where(condition)
+        if after:
+            query = query.where(sql_after(SQLResult.created_at, SQLResult.id, after))
+        result = await self.db.execute(query.order_by(SQLResult.created_at, SQLResult.id).limit(limit + 1))
+        results = result.all()
+        return make_page([{"id": str(r.id), "user_id": str(r.user_id), "module_id": str(r.module_id), "score": r.score, "total_questions": r.total_questions, "time_taken": r.time_taken, "created_at": r.created_at} for r in results], limit)
+    
+    async def _mongo_page(self, query: dict, after: str, limit: int):
+        if after:
+            query.update(mongo_after(after))
+        cursor = self.db.results.find(query).sort([("created_at", 1), ("_id", 1)]).limit(limit + 1)
+        results = await cursor.to_list(length=limit + 1)
+        return make_page([result_helper(r) for r in results], limit)
@@ -0,0 +1,202 @@
+from sqlalchemy import select, delete, insert, func, case, and_, or_
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import aliased
+from app.models.sql_models import Result as SQLResult, UserModuleRollup, ModuleRollup, TIME_BUCKETS, TIME_BUCKET_COLUMNS
+from app.config.settings import settings
+from bson import ObjectId
+from datetime import datetime
+
+ROLLUP_FIELDS = ("attempts", "score_sum", "score_sumsq", "best_score", "latest_score", "latest_at") + TIME_BUCKET_COLUMNS
+
+def time_bucket(time_taken: int):
+    """Histogram column an attempt's time falls into, or None when the time is unknown."""
+    if time_taken is None:
+        return None
+    for bound, column in zip(TIME_BUCKETS, TIME_BUCKET_COLUMNS):
+        if time_taken <= bound:
+            return column
+    return TIME_BUCKET_COLUMNS[-1]
+
+def rollup_to_dict(row) -> dict:
+    get = row.get if isinstance(row, dict) else lambda field, default=None: getattr(row, field, default)
+    rollup = {field: get(field) for field in ROLLUP_FIELDS}
+    for column in TIME_BUCKET_COLUMNS:
+        rollup[column] = rollup[column] or 0
+    for key in ("user_id", "module_id"):
+        if get(key) is not None:
+            rollup[key] = str(get(key))
+    return rollup
+
+class RollupRepository:
+    """Running per-(user, module) and per-module result statistics.
+
+    `record_result` keeps them current as results are written; `rebuild`
+    recomputes them from the raw results.
+    """
+    def __init__(self, db):
+        self.db = db
+        self.db_type = settings.DATABASE_TYPE
+
+    async def record_result(self, user_id: str, module_id: str, score: float, time_taken: int, created_at: datetime):
+        """Fold one result into both rollups.
+
+        On SQLite this only executes statements; the caller commits them in
+        the same transaction as the result row. On Mongo each rollup document
+        is updated atomically on its own.
+        """
+        bucket = time_bucket(time_taken)
+        if self.db_type == "sqlite":
+            for model, keys in ((UserModuleRollup, {"user_id": int(user_id), "module_id": int(module_id)}), (ModuleRollup, {"module_id": int(module_id)})):
+                await self.db.execute(self._sql_upsert(model, keys, score, created_at, bucket))
+        else:
+            update = self._mongo_update(score, created_at, bucket)
+            await self.db.user_module_rollups.update_one({"user_id": ObjectId(user_id), "module_id": ObjectId(module_id)}, update, upsert=True)
+            await self.db.module_rollups.update_one({"module_id": ObjectId(module_id)}, update, upsert=True)
+
+    def _sql_upsert(self, model, keys: dict, score: float, created_at: datetime, bucket: str):
+        values = {
+            **keys,
+            "attempts": 1,
+            "score_sum": score,
+            "score_sumsq": score * score,
+            "best_score": score,
+            "latest_score": score,
+            "latest_at": created_at,
+            **{column: int(column == bucket) for column in TIME_BUCKET_COLUMNS}
+        }
+        stmt = sqlite_insert(model).values(**values)
+        current = model.__table__.c
+        new = stmt.excluded
+        # Column references in the SET clause read the row as it was before this update
+        return stmt.on_conflict_do_update(
+            index_elements=list(keys),
+            set_={
+                "attempts": current.attempts + 1,
+                "score_sum": current.score_sum + new.score_sum,
+                "score_sumsq": current.score_sumsq + new.score_sumsq,
+                "best_score": func.max(func.coalesce(current.best_score, new.best_score), new.best_score),
+                "latest_score": case((or_(current.latest_at.is_(None), new.latest_at >= current.latest_at), new.latest_score), else_=current.latest_score),
+                "latest_at": func.max(func.coalesce(current.latest_at, new.latest_at), new.latest_at),
+                **{column: current[column] + new[column] for column in TIME_BUCKET_COLUMNS}
+            }
+        )
+
+    def _mongo_update(self, score: float, created_at: datetime, bucket: str) -> list:
+        # An update pipeline, so latest_score can be replaced only when this result really is newer
+        fields = {
+            "attempts": {"$add": [{"$ifNull": ["$attempts", 0]}, 1]},
+            "score_sum": {"$add": [{"$ifNull": ["$score_sum", 0]}, score]},
+            "score_sumsq": {"$add": [{"$ifNull": ["$score_sumsq", 0]}, score * score]},
+            "best_score": {"$max": ["$best_score", score]},
+            "latest_score": {"$cond": [{"$gte": [created_at, {"$ifNull": ["$latest_at", created_at]}]}, score, "$latest_score"]},
+            "latest_at": {"$max": ["$latest_at", created_at]}
+        }
+        if bucket:
+            fields[bucket] = {"$add": [{"$ifNull": [f"${bucket}", 0]}, 1]}
+        return [{"$set": fields}]
+
+    async def get_user_rollups(self, user_id: str) -> list[dict]:
+        if self.db_type == "sqlite":
+            result = await self.db.execute(select(UserModuleRollup).where(UserModuleRollup.user_id == int(user_id)))
+            return [rollup_to_dict(r) for r in result.scalars().all()]
+        else:
+            cursor = self.db.user_module_rollups.find({"user_id": ObjectId(user_id)})
+            return [rollup_to_dict(r) for r in await cursor.to_list(length=None)]
+
+    async def get_module_rollup(self, module_id: str):
+        if self.db_type == "sqlite":
+            result = await self.db.execute(select(ModuleRollup).where(ModuleRollup.module_id == int(module_id)))
+            rollup = result.scalar_one_or_none()
+        else:
+            rollup = await self.db.module_rollups.find_one({"module_id": ObjectId(module_id)})
+        return rollup_to_dict(rollup) if rollup else None
+
+    async def get_leaderboard(self, module_id: str, limit: int) -> list[dict]:
+        """Users with the best scores on a module, earliest to reach their best first on ties."""
+        if self.db_type == "sqlite":
+            result = await self.db.execute(
+                select(UserModuleRollup)
+                .where(UserModuleRollup.module_id == int(module_id))
+                .order_by(UserModuleRollup.best_score.desc(), UserModuleRollup.attempts, UserModuleRollup.user_id)
+                .limit(limit)
+            )
+            rows = result.scalars().all()
+        else:
+            cursor = self.db.user_module_rollups.find({"module_id": ObjectId(module_id)}).sort([("best_score", -1), ("attempts", 1), ("user_id", 1)]).limit(limit)
+            rows = await cursor.to_list(length=limit)
+        return [rollup_to_dict(r) for r in rows]
+
+    async def rebuild(self) -> dict:
+        """Recompute every rollup from the results table; run it while result writes are paused."""
+        if self.db_type == "sqlite":
+            for model, keys in ((UserModuleRollup, ("user_id", "module_id")), (ModuleRollup, ("module_id",))):
+                await self.db.execute(delete(model))
+                await self.db.execute(insert(model).from_select([*keys, *ROLLUP_FIELDS], self._sql_aggregate(keys)))
+            await self.db.commit()
+            return {
+                "user_module": (await self.db.execute(select(func.count()).select_from(UserModuleRollup))).scalar_one(),
+                "module": (await self.db.execute(select(func.count()).select_from(ModuleRollup))).scalar_one()
+            }
+        else:
+            for keys, collection in ((("user_id", "module_id"), "user_module_rollups"), (("module_id",), "module_rollups")):
+                await self.db.results.aggregate(self._mongo_aggregate(keys, collection)).to_list(length=None)
+            return {
+                "user_module": await self.db.user_module_rollups.count_documents({}),
+                "module": await self.db.module_rollups.count_documents({})
+            }
+
+    def _sql_aggregate(self, keys: tuple):
+        group_by = [getattr(SQLResult, key) for key in keys]
+        latest = aliased(SQLResult)
+        latest_score = (
+            select(latest.score)
+            .where(*[getattr(latest, key) == getattr(SQLResult, key) for key in keys])
+            .order_by(latest.created_at.desc(), latest.id.desc())
+            .limit(1)
+            .scalar_subquery()
+        )
+        buckets = []
+        lower = None
+        for bound in TIME_BUCKETS:
+            condition = SQLResult.time_taken <= bound if lower is None else and_(SQLResult.time_taken > lower, SQLResult.time_taken <= bound)
+            buckets.append(func.sum(case((condition, 1), else_=0)))
+            lower = bound
+        buckets.append(func.sum(case((SQLResult.time_taken > lower, 1), else_=0)))
+        return select(
+            *group_by,
+            func.count(SQLResult.id),
+            func.sum(SQLResult.score),
+            func.sum(SQLResult.score * SQLResult.score),
+            func.max(SQLResult.score),
+            latest_score,
+            func.max(SQLResult.created_at),
+            *buckets
+        ).group_by(*group_by)
+
+    def _mongo_aggregate(self, keys: tuple, collection: str) -> list:
+        buckets = {}
+        lower = None
+        for bound, column in zip(TIME_BUCKETS, TIME_BUCKET_COLUMNS):
+            conditions = [{"$isNumber": "$time_taken"}, {"$lte": ["$time_taken", bound]}]
+            if lower is not None:
+                conditions.append({"$gt": ["$time_taken", lower]})
+            buckets[column] = {"$sum": {"$cond": [{"$and": conditions}, 1, 0]}}
+            lower = bound
+        buckets[TIME_BUCKET_COLUMNS[-1]] = {"$sum": {"$cond": [{"$and": [{"$isNumber": "$time_taken"}, {"$gt": ["$time_taken", lower]}]}, 1, 0]}}
+        return [
+            {"$sort": {"created_at": -1, "_id": -1}},
+            {"$group": {
+                "_id": {key: f"${key}" for key in keys},
+                "attempts": {"$sum": 1},
+                "score_sum": {"$sum": "$score"},
+                "score_sumsq": {"$sum": {"$multiply": ["$score", "$score"]}},
+                "best_score": {"$max": "$score"},
+                # Input is newest first, so $first is the latest attempt
+                "latest_score": {"$first": "$score"},
+                "latest_at": {"$max": "$created_at"},
+                **buckets
+            }},
+            {"$project": {"_id": 0, **{key: f"$_id.{key}" for key in keys}, **{field: 1 for field in ROLLUP_FIELDS}}},
+            # $out swaps the collection in one step, so readers never see a half-built rollup
+            {"$out": collection}
+        ]
@@ -0,0 +1,34 @@
+from sqlalchemy import select
+from app.models.sql_models import Upload as SQLUpload
+from app.models.mongo_models import upload_helper
+from app.config.settings import settings
+from pymongo import ReturnDocument
+from datetime import datetime
+
+class UploadRepository:
+    def __init__(self, db):
+        self.db = db
+        self.db_type = settings.DATABASE_TYPE
+
+    async def add_reference(self, user_id: str, sha256: str, filename: str, size: int):
+        """Record that `user_id` uploaded the stored object `sha256`; re-uploads refresh the filename."""
+        if self.db_type == "sqlite":
+            result = await self.db.execute(select(SQLUpload).where(SQLUpload.user_id == str(user_id), SQLUpload.sha256 == sha256))
+            upload = result.scalar_one_or_none()
+            if upload:
+                upload.filename = filename
+            else:
+                upload = SQLUpload(user_id=str(user_id), sha256=sha256, filename=filename, size=size)
+                self.db.add(upload)
+            await self.db.commit()
+            await self.db.refresh(upload)
+            return {"id": str(upload.id), "user_id": upload.user_id, "sha256": upload.sha256, "filename": upload.filename, "size": upload.size, "created_at": upload.created_at}
+        else:
+            upload = await self.db.uploads.find_one_and_update(
+                {"user_id": str(user_id), "sha256": sha256},
+                {"$set": {"filename": filename, "size": size}, "$setOnInsert": {"created_at": datetime.utcnow()}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+            return upload_helper(upload)
+
@@ -1,4 +1,4 @@
-from sqlalchemy import select
+from sqlalchemy import select, update
 from app.models.sql_models import User as SQLUser
 from app.models.mongo_models import user_helper
 from app.config.settings import settings
@@ -49,3 +49,10 @@ class UserRepository:
         else:
             user = await self.db.users.find_one({"_id": ObjectId(user_id)})
             return user_helper(user) if user else None
+    
+    async def update_password(self, user_id: str, hashed_password: str):
+        if self.db_type == "sqlite":
+            await self.db.execute(update(SQLUser).where(SQLUser.id == int(user_id)).values(hashed_password=hashed_password))
+            await self.db.commit()
+        else:
+            await self.db.users.update_one({"_id": ObjectId(user_id)}, {"$set": {"hashed_password": hashed_password}})
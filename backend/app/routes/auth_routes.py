@@ -1,9 +1,9 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from app.schemas.user_schema import UserCreate, UserLogin, Token, UserResponse
 from app.repositories.user_repository import UserRepository
-from app.utils.auth_utils import hash_password, verify_password
+from app.utils.auth_utils import hash_password, verify_and_update
 from app.utils.token import create_access_token
-from app.config.database import get_db
+from app.config.database import get_db, release_connection
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
@@ -14,7 +14,9 @@ async def register(user: UserCreate, db=Depends(get_db)):
     if existing:
         raise HTTPException(status_code=400, detail="Email already registered")
     
-    hashed_pwd = hash_password(user.password)
+    # Hashing takes a while; do not hold a pooled connection through it
+    await release_connection(db)
+    hashed_pwd = await hash_password(user.password)
     new_user = await repo.create_user(user.email, hashed_pwd, user.full_name)
     return new_user
 
@@ -23,8 +25,15 @@ async def login(credentials: UserLogin, db=Depends(get_db)):
     repo = UserRepository(db)
     user = await repo.get_user_by_email(credentials.email)
     
-    if not user or not verify_password(credentials.password, user["hashed_password"]):
+    if not user:
         raise HTTPException(status_code=401, detail="Invalid credentials")
+    await release_connection(db)
+    valid, new_hash = await verify_and_update(credentials.password, user["hashed_password"])
+    if not valid:
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+    if new_hash:
+        # Hashed under an older BCRYPT_ROUNDS; upgrade it now that the plain password is at hand
+        await repo.update_password(user["id"], new_hash)
     
     token = create_access_token({"sub": user["id"]})
     return {"access_token": token, "token_type": "bearer"}
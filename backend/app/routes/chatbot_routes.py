@@ -1,11 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
+from contextlib import aclosing
 from app.repositories.module_repository import ModuleRepository
-from app.services.ai_module_generator import generate_module_with_gemini
-from app.routes.upload_routes import get_current_user
-from app.config.database import get_db
-import httpx
+from app.services.chatbot_service import build_chat_prompt, stream_chat_answer, answer_cache, answer_cache_key, get_answer_cache_stats, CHAT_MODEL
+from app.routes.dependencies import get_current_user
+from app.config.database import get_db, release_connection
+from app.services.http_client import get_gemini_client
 from app.config.settings import settings
+from app.utils.sse import format_sse, SSE_HEADERS
+import httpx
+import logging
+import time
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/chatbot", tags=["Chatbot"])
 
@@ -21,19 +29,79 @@ async def ask_chatbot(request: ChatRequest, user_id: str = Depends(get_current_u
     if not module:
         raise HTTPException(status_code=404, detail="Module not found")
     
-    context = f"Module: {module['title']}\nContent: {module['content']}\n"
-    if module.get('pdf_text'):
-        context += f"PDF Text: {module['pdf_text'][:1000]}\n"
+    cache_key = answer_cache_key(module, request.question)
+    answer = answer_cache.get(cache_key)
+    if answer is not None:
+        return {"question": request.question, "answer": answer, "cache": "hit"}
     
-    prompt = f"{context}\n\nUser Question: {request.question}\n\nAnswer:"
+    prompt = await build_chat_prompt(module, request.question, db)
+    await release_connection(db)
     
-    url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-pro:generateContent?key={settings.GEMINI_API_KEY}"
+    url = f"/v1beta/models/{CHAT_MODEL}:generateContent?key={settings.GEMINI_API_KEY}"
     payload = {"contents": [{"parts": [{"text": prompt}]}]}
     
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        response = await client.post(url, json=payload)
-        response.raise_for_status()
-        data = response.json()
-        answer = data["candidates"][0]["content"]["parts"][0]["text"]
+    client = get_gemini_client()
+    response = await client.post(url, json=payload)
+    response.raise_for_status()
+    data = response.json()
+    answer = data["candidates"][0]["content"]["parts"][0]["text"]
+    answer_cache.set(cache_key, answer)
+    
+    return {"question": request.question, "answer": answer, "cache": "miss"}
+
+@router.post("/ask/stream")
+async def ask_chatbot_stream(request: ChatRequest, http_request: Request, user_id: str = Depends(get_current_user), db=Depends(get_db)):
+    """Same as /ask, but relays the answer as `token` events while Gemini writes it, then a final `done` event."""
+    repo = ModuleRepository(db)
+    module = await repo.get_module_by_id(request.module_id)
+    
+    if not module:
+        raise HTTPException(status_code=404, detail="Module not found")
+    
+    cache_key = answer_cache_key(module, request.question)
+    cached_answer = answer_cache.get(cache_key)
+    if cached_answer is not None:
+        async def replay_stream():
+            # Same event shape as a live answer, so clients need no special case
+            yield format_sse({"text": cached_answer}, event="token")
+            yield format_sse({"question": request.question, "answer": cached_answer, "cache": "hit"}, event="done")
+        
+        await release_connection(db)
+        return StreamingResponse(replay_stream(), media_type="text/event-stream", headers=SSE_HEADERS)
     
-    return {"question": request.question, "answer": answer}
+    prompt = await build_chat_prompt(module, request.question, db)
+    # Nothing below reads the database; do not hold a pooled connection for the whole stream
+    await release_connection(db)
+    
+    async def event_stream():
+        pieces = []
+        outcome = "cancelled"
+        started = time.monotonic()
+        first_token_at = None
+        try:
+            # aclosing() makes a disconnect close the upstream request right away instead of at GC time
+            async with aclosing(stream_chat_answer(prompt)) as chunks:
+                async for text in chunks:
+                    if first_token_at is None:
+                        first_token_at = time.monotonic()
+                    pieces.append(text)
+                    yield format_sse({"text": text}, event="token")
+                    if await http_request.is_disconnected():
+                        return
+            outcome = "completed"
+            # Only complete answers are cached; a cut-off stream must not be replayed to the next student
+            answer_cache.set(cache_key, "".join(pieces))
+            yield format_sse({"question": request.question, "answer": "".join(pieces), "cache": "miss"}, event="done")
+        except (httpx.HTTPError, ValueError) as e:
+            outcome = "failed"
+            logger.error(f"Chatbot stream failed: {str(e)}")
+            yield format_sse({"detail": "Chatbot answer failed"}, event="error")
+        finally:
+            ttft = f"{first_token_at - started:.2f}s" if first_token_at is not None else "n/a"
+            logger.info(f"Chatbot stream {outcome} for module {request.module_id} (first token {ttft}): {''.join(pieces)!r}")
+    
+    return StreamingResponse(event_stream(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+@router.get("/cache-stats")
+async def chatbot_cache_stats(user_id: str = Depends(get_current_user)):
+    return get_answer_cache_stats()
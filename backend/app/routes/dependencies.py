@@ -0,0 +1,12 @@
+from fastapi import Header, HTTPException
+from app.utils.token import verify_token
+
+async def get_current_user(authorization: str = Header(None)):
+    # async so FastAPI calls it inline instead of dispatching it to its thread pool on every request
+    if not authorization or not authorization.startswith("Bearer "):
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    token = authorization[len("Bearer "):]
+    payload = verify_token(token)
+    if not payload:
+        raise HTTPException(status_code=401, detail="Invalid token")
+    return payload["sub"]
@@ -0,0 +1,56 @@
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from app.schemas.job_schema import JobResponse
+from app.repositories.job_repository import JobRepository
+from app.services.job_queue import job_queue, TERMINAL_STATUSES
+from app.routes.dependencies import get_current_user
+from app.config.database import get_db, session_scope
+from app.config.settings import settings
+from app.utils.sse import format_sse, sse_comment, SSE_HEADERS
+import time
+
+router = APIRouter(prefix="/jobs", tags=["Jobs"])
+
+def _job_state(job: dict) -> dict:
+    return {k: job[k] for k in ("id", "status", "stage", "progress")}
+
+@router.get("/{job_id}", response_model=JobResponse)
+async def get_job(job_id: str, user_id: str = Depends(get_current_user), db=Depends(get_db)):
+    repo = JobRepository(db)
+    job = await repo.get_job(job_id)
+    # Someone else's job is reported as missing rather than forbidden, so ids cannot be probed
+    if not job or job["user_id"] != str(user_id):
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@router.get("/{job_id}/events")
+async def stream_job_events(job_id: str, request: Request, user_id: str = Depends(get_current_user)):
+    # Each poll uses its own short-lived handle so the stream never pins a DB transaction open
+    async with session_scope() as db:
+        job = await JobRepository(db).get_job(job_id)
+    if not job or job["user_id"] != str(user_id):
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def event_stream():
+        last_state = None
+        last_sent = time.monotonic()
+        while True:
+            async with session_scope() as db:
+                current = await JobRepository(db).get_job(job_id)
+            state = _job_state(current)
+            if state != last_state:
+                last_state = state
+                last_sent = time.monotonic()
+                yield format_sse(state, event="progress")
+            if current["status"] in TERMINAL_STATUSES:
+                final = {"id": job_id, "status": current["status"], "result": current["result"], "error": current["error"]}
+                yield format_sse(final, event=current["status"])
+                return
+            if await request.is_disconnected():
+                return
+            if time.monotonic() - last_sent >= settings.SSE_KEEPALIVE_SECONDS:
+                last_sent = time.monotonic()
+                yield sse_comment()
+            await job_queue.wait_for_update(job_id, settings.JOB_EVENT_POLL_SECONDS)
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream", headers=SSE_HEADERS)
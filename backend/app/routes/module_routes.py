@@ -1,11 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException
-from app.schemas.module_schema import ModuleCreate, ModuleResponse, AIModuleRequest
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import JSONResponse
+from app.schemas.module_schema import ModuleCreate, ModuleResponse, ModulePage, AIModuleRequest
 from app.repositories.module_repository import ModuleRepository
-from app.services.ai_module_generator import generate_module_with_gemini
-from app.services.youtube_service import search_youtube_video
-from app.routes.upload_routes import get_current_user
+from app.repositories.quiz_repository import QuizRepository
+from app.services.module_pipeline import build_module
+from app.services.ai_module_generator import TooManyChunks
+from app.services.job_queue import job_queue
+from app.routes.dependencies import get_current_user
 from app.config.database import get_db
-from typing import List
+from app.config.settings import settings
+from app.utils.pagination import InvalidCursor
+from app.utils.responses import ORJSONResponse
+from typing import Optional
 
 router = APIRouter(prefix="/modules", tags=["Modules"])
 
@@ -15,11 +21,15 @@ async def create_module(module: ModuleCreate, user_id: str = Depends(get_current
     new_module = await repo.create_module(user_id, module.title, module.content, module.pdf_text, module.video_id)
     return new_module
 
-@router.get("/", response_model=List[ModuleResponse])
-async def get_my_modules(user_id: str = Depends(get_current_user), db=Depends(get_db)):
+@router.get("/", response_model=ModulePage)
+async def get_my_modules(after: Optional[str] = None, limit: int = Query(settings.DEFAULT_PAGE_SIZE, ge=1, le=settings.MAX_PAGE_SIZE), user_id: str = Depends(get_current_user), db=Depends(get_db)):
     repo = ModuleRepository(db)
-    modules = await repo.get_user_modules(user_id)
-    return modules
+    try:
+        page = await repo.get_user_modules(user_id, after, limit)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    # Summaries come out of the repository already matching ModuleSummary; validating them again would cost more than rendering them
+    return ORJSONResponse(page)
 
 @router.get("/{module_id}", response_model=ModuleResponse)
 async def get_module(module_id: str, user_id: str = Depends(get_current_user), db=Depends(get_db)):
@@ -27,25 +37,25 @@ async def get_module(module_id: str, user_id: str = Depends(get_current_user), d
     module = await repo.get_module_by_id(module_id)
     if not module:
         raise HTTPException(status_code=404, detail="Module not found")
-    return module
+    return ORJSONResponse(module)
+
+@router.get("/{module_id}/quiz")
+async def get_module_quiz(module_id: str, user_id: str = Depends(get_current_user), db=Depends(get_db)):
+    repo = QuizRepository(db)
+    quiz = await repo.get_quiz(module_id)
+    if not quiz:
+        raise HTTPException(status_code=404, detail="Quiz not found")
+    # The answer key stays on the server
+    return ORJSONResponse({"module_id": quiz["module_id"], "questions": quiz["questions"]})
 
 @router.post("/generate-ai")
-async def generate_ai_module(request: AIModuleRequest, user_id: str = Depends(get_current_user), db=Depends(get_db)):
-    ai_result = await generate_module_with_gemini(request.extracted_text)
-    
-    video_id = await search_youtube_video(ai_result["title"])
-    
-    repo = ModuleRepository(db)
-    module = await repo.create_module(
-        user_id, 
-        ai_result["title"], 
-        ai_result["content"], 
-        request.extracted_text,
-        video_id
-    )
+async def generate_ai_module(request: AIModuleRequest, background: bool = False, user_id: str = Depends(get_current_user), db=Depends(get_db)):
+    options = {"chunked": request.chunked, "chunk_tokens": request.chunk_tokens, "max_parallel": request.max_parallel}
+    if background:
+        job = await job_queue.submit(db, user_id, "generate_module", {"user_id": user_id, "extracted_text": request.extracted_text, **options})
+        return JSONResponse(status_code=202, content={"job_id": job["id"], "status": job["status"]})
     
-    return {
-        "module": module,
-        "mcqs": ai_result["mcqs"],
-        "video_id": video_id
-    }
+    try:
+        return await build_module(user_id, db, extracted_text=request.extracted_text, **options)
+    except TooManyChunks as e:
+        raise HTTPException(status_code=400, detail=str(e))
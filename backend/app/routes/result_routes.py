@@ -1,52 +1,94 @@
-from fastapi import APIRouter, Depends, HTTPException
-from app.schemas.result_schema import ResultResponse, MCQSubmission
+from fastapi import APIRouter, Depends, HTTPException, Query
+from app.schemas.result_schema import MCQResultResponse, ResultPage, MCQSubmission
 from app.repositories.result_repository import ResultRepository
-from app.repositories.module_repository import ModuleRepository
-from app.services.mcq_generator import calculate_score
-from app.services.result_analyzer import analyze_results
-from app.routes.upload_routes import get_current_user
-from app.config.database import get_db
-from typing import List
+from app.repositories.quiz_repository import QuizRepository
+from app.repositories.rollup_repository import RollupRepository
+from app.services.mcq_generator import calculate_score, get_answer_key
+from app.services.result_batcher import result_batcher
+from app.services.result_analyzer import analyze_results, summarize_rollup
+from app.routes.dependencies import get_current_user
+from app.config.database import get_db, release_connection
+from app.config.settings import settings
+from app.utils.pagination import InvalidCursor
+from app.utils.responses import ORJSONResponse
+from typing import Optional
 
 router = APIRouter(prefix="/results", tags=["Results"])
 
-@router.post("/submit-mcq", response_model=ResultResponse)
+@router.post("/submit-mcq", response_model=MCQResultResponse)
 async def submit_mcq(submission: MCQSubmission, user_id: str = Depends(get_current_user), db=Depends(get_db)):
-    module_repo = ModuleRepository(db)
-    module = await module_repo.get_module_by_id(submission.module_id)
+    answer_key = await get_answer_key(submission.module_id, db)
     
-    if not module:
+    if answer_key is None:
         raise HTTPException(status_code=404, detail="Module not found")
     
-    correct_answers = [0, 1, 2, 0, 1]
-    score = calculate_score(submission.answers, correct_answers)
+    correct_answers, from_stored_quiz = answer_key
+    try:
+        score, correct = calculate_score(submission.answers, correct_answers)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    # Per-question statistics only make sense for a module's real quiz, not the legacy key
+    question_results = correct.tolist() if from_stored_quiz else None
     
-    result_repo = ResultRepository(db)
-    result = await result_repo.create_result(
-        user_id, 
-        submission.module_id, 
-        score, 
-        len(correct_answers),
-        submission.time_taken
-    )
+    if result_batcher.running:
+        # The batcher writes through its own session; holding this one would starve the pool under a burst
+        await release_connection(db)
+        result = await result_batcher.submit(user_id, submission.module_id, score, len(correct_answers), submission.time_taken, question_results)
+    else:
+        result_repo = ResultRepository(db)
+        result = await result_repo.create_result(
+            user_id, 
+            submission.module_id, 
+            score, 
+            len(correct_answers),
+            submission.time_taken,
+            question_results
+        )
     
-    return result
+    return {**result, "correct": correct.tolist()}
 
-@router.get("/my-results", response_model=List[ResultResponse])
-async def get_my_results(user_id: str = Depends(get_current_user), db=Depends(get_db)):
+@router.get("/my-results", response_model=ResultPage)
+async def get_my_results(after: Optional[str] = None, limit: int = Query(settings.DEFAULT_PAGE_SIZE, ge=1, le=settings.MAX_PAGE_SIZE), user_id: str = Depends(get_current_user), db=Depends(get_db)):
     repo = ResultRepository(db)
-    results = await repo.get_user_results(user_id)
-    return results
+    try:
+        page = await repo.get_user_results(user_id, after, limit)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return ORJSONResponse(page)
 
-@router.get("/module/{module_id}", response_model=List[ResultResponse])
-async def get_module_results(module_id: str, user_id: str = Depends(get_current_user), db=Depends(get_db)):
+@router.get("/module/{module_id}", response_model=ResultPage)
+async def get_module_results(module_id: str, after: Optional[str] = None, limit: int = Query(settings.DEFAULT_PAGE_SIZE, ge=1, le=settings.MAX_PAGE_SIZE), user_id: str = Depends(get_current_user), db=Depends(get_db)):
     repo = ResultRepository(db)
-    results = await repo.get_module_results(module_id)
-    return results
+    try:
+        page = await repo.get_module_results(module_id, after, limit)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return ORJSONResponse(page)
+
+@router.get("/module/{module_id}/leaderboard")
+async def get_module_leaderboard(module_id: str, limit: int = Query(10, ge=1, le=100), user_id: str = Depends(get_current_user), db=Depends(get_db)):
+    repo = RollupRepository(db)
+    rollup = await repo.get_module_rollup(module_id)
+    if not rollup:
+        return ORJSONResponse({"module_id": module_id, "stats": None, "leaders": []})
+    
+    leaders = await repo.get_leaderboard(module_id, limit)
+    return ORJSONResponse({
+        "module_id": module_id,
+        "stats": summarize_rollup(rollup),
+        "leaders": [{"user_id": r["user_id"], "best_score": r["best_score"], "attempts": r["attempts"], "average_score": r["score_sum"] / r["attempts"]} for r in leaders]
+    })
+
+@router.get("/module/{module_id}/question-stats")
+async def get_question_stats(module_id: str, user_id: str = Depends(get_current_user), db=Depends(get_db)):
+    repo = QuizRepository(db)
+    stats = await repo.get_question_stats(module_id)
+    # Difficulty is the share of attempts that got the question wrong
+    return ORJSONResponse([{**s, "difficulty": 1 - s["correct"] / s["attempts"] if s["attempts"] else None} for s in stats])
 
 @router.get("/analytics")
 async def get_analytics(user_id: str = Depends(get_current_user), db=Depends(get_db)):
-    repo = ResultRepository(db)
-    results = await repo.get_user_results(user_id)
-    analytics = analyze_results(results)
-    return analytics
+    repo = RollupRepository(db)
+    rollups = await repo.get_user_rollups(user_id)
+    analytics = analyze_results(rollups)
+    return ORJSONResponse(analytics)
@@ -1,52 +1,43 @@
-from fastapi import APIRouter, UploadFile, File, Depends
-from app.services.pdf_parser import extract_text_from_pdf
-from app.services.ai_module_generator import generate_module_with_gemini
+from fastapi import APIRouter, UploadFile, File, Depends, HTTPException
+from fastapi.responses import JSONResponse
 from app.services.youtube_service import search_youtube_video
-from app.repositories.module_repository import ModuleRepository
+from app.services.module_pipeline import build_module
+from app.services.ai_module_generator import TooManyChunks
+from app.services.job_queue import job_queue
+from app.services.upload_storage import store_upload, UploadTooLarge
+from app.repositories.upload_repository import UploadRepository
 from app.config.database import get_db
-from pathlib import Path
-import shutil
+from app.config.settings import settings
 
 router = APIRouter(prefix="/test", tags=["Testing - No Auth"])
 
-UPLOAD_DIR = Path("app/storage/uploads")
-
 @router.post("/upload-and-generate")
-async def upload_and_generate_module(file: UploadFile = File(...), db=Depends(get_db)):
+async def upload_and_generate_module(file: UploadFile = File(...), background: bool = False, chunked: bool = False, db=Depends(get_db)):
     """
     Upload PDF → Extract Text → Generate AI Module → Get YouTube Video
-    Returns: module with video_id
+    Returns: module with video_id, or a job id to poll at /jobs/{id} when background=true
+    chunked=true generates from the whole PDF instead of its first pages
     """
     # Save PDF
-    file_path = UPLOAD_DIR / file.filename
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
-    
-    # Extract text
-    extracted_text = await extract_text_from_pdf(str(file_path))
-    
-    # Generate AI module
-    ai_result = await generate_module_with_gemini(extracted_text)
-    
-    # Get YouTube video
-    video_id = await search_youtube_video(ai_result["title"])
+    try:
+        stored = await store_upload(file, settings.MAX_UPLOAD_BYTES)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    await UploadRepository(db).add_reference("1", stored["sha256"], file.filename, stored["size"])
     
-    # Save to database (using dummy user_id = "1")
-    repo = ModuleRepository(db)
-    module = await repo.create_module(
-        user_id="1",
-        title=ai_result["title"],
-        content=ai_result["content"],
-        pdf_text=extracted_text[:1000],
-        video_id=video_id
-    )
+    # Extract, generate, find video and save (using dummy user_id = "1")
+    if background:
+        payload = {"user_id": "1", "upload": stored, "pdf_text_limit": 1000, "chunked": chunked}
+        job = await job_queue.submit(db, "1", "generate_module", payload)
+        return JSONResponse(status_code=202, content={"job_id": job["id"], "status": job["status"]})
     
-    return {
-        "module": module,
-        "mcqs": ai_result["mcqs"],
-        "video_id": video_id,
-        "youtube_url": f"https://www.youtube.com/watch?v={video_id}" if video_id else None
-    }
+    try:
+        result = await build_module("1", db, upload=stored, pdf_text_limit=1000, chunked=chunked)
+    except TooManyChunks as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    video_id = result["video_id"]
+    result["youtube_url"] = f"https://www.youtube.com/watch?v={video_id}" if video_id else None
+    return result
 
 @router.get("/search-video")
 async def search_video(query: str):
@@ -1,62 +1,59 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Header
-from app.services.pdf_parser import extract_text_from_pdf
-from app.utils.token import verify_token
-from pathlib import Path
-import shutil
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
+from app.services.text_cache import extract_text_cached, get_text_cache_stats
+from app.services.upload_storage import store_upload, discard_object, UploadTooLarge, UPLOAD_ROOT
+from app.repositories.upload_repository import UploadRepository
+from app.routes.dependencies import get_current_user
+from app.config.database import get_db
+from app.config.settings import settings
 import logging
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/upload", tags=["Upload"])
 
-UPLOAD_DIR = Path("app/storage/uploads")
-UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
-
-def get_current_user(authorization: str = Header(None)):
-    if not authorization or not authorization.startswith("Bearer "):
-        raise HTTPException(status_code=401, detail="Not authenticated")
-    token = authorization.split(" ")[1]
-    payload = verify_token(token)
-    if not payload:
-        raise HTTPException(status_code=401, detail="Invalid token")
-    return payload["sub"]
+UPLOAD_ROOT.mkdir(parents=True, exist_ok=True)
+PREVIEW_CHARS = 500
 
 @router.post("/pdf")
-async def upload_pdf(file: UploadFile = File(...), user_id: str = Depends(get_current_user)):
+async def upload_pdf(file: UploadFile = File(...), full_length: bool = False, user_id: str = Depends(get_current_user), db=Depends(get_db)):
     try:
         # Validate file type
         if not file.filename.endswith(".pdf"):
             raise HTTPException(status_code=400, detail="Only PDF files allowed")
         
-        # Ensure upload directory exists
-        UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
-        
-        # Save uploaded file
-        file_path = UPLOAD_DIR / f"{user_id}_{file.filename}"
+        # Save uploaded file, content-addressed by its SHA-256
         try:
-            with open(file_path, "wb") as buffer:
-                shutil.copyfileobj(file.file, buffer)
+            stored = await store_upload(file, settings.MAX_UPLOAD_BYTES)
+        except UploadTooLarge as e:
+            raise HTTPException(status_code=413, detail=str(e))
         except Exception as e:
             logger.error(f"File save error: {str(e)}")
             raise HTTPException(status_code=500, detail=f"Failed to save file: {str(e)}")
         
         # Extract text from PDF
         try:
-            extracted_text = await extract_text_from_pdf(str(file_path))
+            # Parsing the whole document is only needed to report its full length
+            # Re-uploads of the same file are served from the text cache without parsing
+            extracted_text = await extract_text_cached(stored["path"], stored["sha256"], stored["size"], max_chars=None if full_length else PREVIEW_CHARS)
             if not extracted_text.strip():
                 raise HTTPException(status_code=400, detail="PDF appears to be empty or unreadable")
         except Exception as e:
             logger.error(f"PDF extraction error: {str(e)}")
-            # Clean up file on extraction failure
-            if file_path.exists():
-                file_path.unlink()
+            # Clean up file on extraction failure, unless it was already stored for someone else
+            if not stored["deduplicated"]:
+                discard_object(stored["sha256"])
             raise HTTPException(status_code=500, detail=f"Failed to extract text from PDF: {str(e)}")
         
+        repo = UploadRepository(db)
+        await repo.add_reference(user_id, stored["sha256"], file.filename, stored["size"])
+        
         return {
             "filename": file.filename,
-            "file_path": str(file_path),
-            "extracted_text": extracted_text[:500],
-            "full_text_length": len(extracted_text)
+            "file_path": stored["path"],
+            "sha256": stored["sha256"],
+            "deduplicated": stored["deduplicated"],
+            "extracted_text": extracted_text[:PREVIEW_CHARS],
+            "full_text_length": len(extracted_text) if full_length else None
         }
         
     except HTTPException:
@@ -64,3 +61,7 @@ async def upload_pdf(file: UploadFile = File(...), user_id: str = Depends(get_cu
     except Exception as e:
         logger.error(f"Unexpected error in upload_pdf: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+@router.get("/cache-stats")
+async def text_cache_stats(user_id: str = Depends(get_current_user)):
+    return get_text_cache_stats()
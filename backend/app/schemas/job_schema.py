@@ -0,0 +1,14 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Optional
+
+class JobResponse(BaseModel):
+    id: str
+    kind: str
+    status: str
+    stage: Optional[str]
+    progress: int
+    result: Optional[dict]
+    error: Optional[str]
+    created_at: datetime
+    updated_at: datetime
@@ -1,6 +1,6 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 
 class ModuleCreate(BaseModel):
     title: str
@@ -17,8 +17,21 @@ class ModuleResponse(BaseModel):
     video_id: Optional[str]
     created_at: datetime
 
+class ModuleSummary(BaseModel):
+    id: str
+    title: str
+    video_id: Optional[str]
+    created_at: datetime
+
+class ModulePage(BaseModel):
+    items: List[ModuleSummary]
+    next_cursor: Optional[str]
+
 class AIModuleRequest(BaseModel):
     extracted_text: str
+    chunked: bool = False
+    chunk_tokens: Optional[int] = Field(None, ge=200, le=30000)
+    max_parallel: Optional[int] = Field(None, ge=1, le=16)
 
 class AIModuleResponse(BaseModel):
     title: str
@@ -1,6 +1,6 @@
 from pydantic import BaseModel
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 
 class ResultCreate(BaseModel):
     module_id: str
@@ -17,6 +17,14 @@ class ResultResponse(BaseModel):
     time_taken: Optional[int]
     created_at: datetime
 
+class MCQResultResponse(ResultResponse):
+    # Which answers were right, in question order
+    correct: List[bool]
+
+class ResultPage(BaseModel):
+    items: List[ResultResponse]
+    next_cursor: Optional[str]
+
 class MCQSubmission(BaseModel):
     module_id: str
     answers: list[int]
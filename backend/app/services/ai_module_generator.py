@@ -1,50 +1,152 @@
+import asyncio
 import httpx
 import json
 import logging
 from app.config.settings import settings
+from app.services.http_client import get_gemini_client
 
 logger = logging.getLogger(__name__)
 
-async def generate_module_with_gemini(extracted_text: str) -> dict:
+# Bump whenever the prompt changes so cached generations from the old prompt are not reused
+PROMPT_VERSION = "1"
+# Only this much of the source text is sent to Gemini, so callers need not extract more
+PROMPT_TEXT_CHARS = 3000
+# Rough English average, good enough to size chunks without a tokenizer
+CHARS_PER_TOKEN = 4
+MAX_COLLAPSE_ROUNDS = 2
+
+class TooManyChunks(ValueError):
+    """The document needs more chunks than GENERATION_MAX_CHUNKS at the requested chunk size."""
+    pass
+
+MODULE_JSON_FORMAT = """Return in this JSON format:
+{
+  "title": "Module Title",
+  "content": "Detailed summary...",
+  "mcqs": [
+    {"question": "Q1?", "options": ["A", "B", "C", "D"], "correct": 0}
+  ]
+}"""
+
+async def _generate_text(prompt: str) -> str:
+    url = f"/v1beta/models/{settings.GEMINI_MODEL}:generateContent?key={settings.GEMINI_API_KEY}"
+    payload = {"contents": [{"parts": [{"text": prompt}]}]}
+
+    client = get_gemini_client()
+    response = await client.post(url, json=payload)
+    response.raise_for_status()
+    data = response.json()
+
+    if "candidates" not in data or not data["candidates"]:
+        raise ValueError("Invalid response from Gemini API")
+
+    return data["candidates"][0]["content"]["parts"][0]["text"]
+
+def _parse_module_json(text_response: str) -> dict:
+    start = text_response.find("{")
+    end = text_response.rfind("}") + 1
+
+    if start == -1 or end == 0:
+        raise ValueError("No valid JSON found in Gemini response")
+
+    json_str = text_response[start:end]
+    return json.loads(json_str)
+
+def split_into_chunks(text: str, chunk_tokens: int) -> list[str]:
+    """Split text into pieces of about `chunk_tokens` tokens, preferring paragraph, then sentence, then word breaks."""
+    limit = max(1, chunk_tokens) * CHARS_PER_TOKEN
+    chunks = []
+    start = 0
+    while start < len(text):
+        end = min(start + limit, len(text))
+        if end < len(text):
+            window = text[start:end]
+            for separator in ("\n\n", ". ", "\n", " "):
+                cut = window.rfind(separator)
+                # Only accept a break in the second half, otherwise chunks get needlessly small
+                if cut > limit // 2:
+                    end = start + cut + len(separator)
+                    break
+        chunk = text[start:end].strip()
+        if chunk:
+            chunks.append(chunk)
+        start = end
+    return chunks
+
+async def _summarize_chunks(chunks: list[str], max_parallel: int) -> list[str]:
+    semaphore = asyncio.Semaphore(max(1, max_parallel))
+    total = len(chunks)
+
+    async def summarize(index: int, chunk: str) -> str:
+        prompt = f"""This is part {index + 1} of {total} of a document. Summarize its key points, definitions and facts as concise bullet points. Keep anything a quiz question could be written about.
+
+Text: {chunk}"""
+        async with semaphore:
+            return await _generate_text(prompt)
+
+    tasks = [asyncio.create_task(summarize(i, chunk)) for i, chunk in enumerate(chunks)]
+    try:
+        return await asyncio.gather(*tasks)
+    finally:
+        # gather() raises on the first failure but leaves the other calls running, spending quota on a failed request
+        for task in tasks:
+            task.cancel()
+
+async def _generate_module_map_reduce(extracted_text: str, chunk_tokens: int, max_parallel: int) -> dict:
+    chunks = split_into_chunks(extracted_text, chunk_tokens)
+    if len(chunks) > settings.GENERATION_MAX_CHUNKS:
+        raise TooManyChunks(f"Document splits into {len(chunks)} chunks, more than the limit of {settings.GENERATION_MAX_CHUNKS}; use a larger chunk size")
+
+    summaries = await _summarize_chunks(chunks, max_parallel)
+    combined = "\n\n".join(f"Part {i + 1}:\n{summary}" for i, summary in enumerate(summaries))
+    # Collapse again if the summaries themselves are too long for one reduce call
+    for _ in range(MAX_COLLAPSE_ROUNDS):
+        if len(combined) <= chunk_tokens * CHARS_PER_TOKEN:
+            break
+        summaries = await _summarize_chunks(split_into_chunks(combined, chunk_tokens), max_parallel)
+        combined = "\n\n".join(f"Part {i + 1}:\n{summary}" for i, summary in enumerate(summaries))
+
+    prompt = f"""The following are summaries of every part of a document, in order. Based on the whole document, create a structured learning module with:
+1. A clear title
+2. Organized content summary (key points) covering all parts
+3. 5 multiple choice questions with 4 options each and correct answer index (0-3), drawn from across the document
+
+Summaries:
+{combined}
+
+{MODULE_JSON_FORMAT}"""
+    return _parse_module_json(await _generate_text(prompt))
+
+async def generate_module_with_gemini(extracted_text: str, chunked: bool = False, chunk_tokens: int = None, max_parallel: int = None) -> dict:
+    """Generate a module from the first PROMPT_TEXT_CHARS characters, or from the whole text when `chunked`.
+
+    Chunked mode summarizes token-sized chunks concurrently (at most
+    `max_parallel` Gemini calls at once) and then runs a single reduce call
+    that writes the module from those summaries.
+    """
     try:
-        url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-2.5-flash:generateContent?key={settings.GEMINI_API_KEY}"
-        
+        if chunked:
+            chunk_tokens = chunk_tokens or settings.GENERATION_CHUNK_TOKENS
+            max_parallel = max_parallel or settings.GENERATION_MAX_PARALLEL
+            if len(extracted_text) > chunk_tokens * CHARS_PER_TOKEN:
+                return await _generate_module_map_reduce(extracted_text, chunk_tokens, max_parallel)
+            text = extracted_text
+        else:
+            text = extracted_text[:PROMPT_TEXT_CHARS]
+
         prompt = f"""Based on the following text, create a structured learning module with:
 1. A clear title
 2. Organized content summary (key points)
 3. 5 multiple choice questions with 4 options each and correct answer index (0-3)
 
-Text: {extracted_text[:3000]}
+Text: {text}
 
-Return in this JSON format:
-{{
-  "title": "Module Title",
-  "content": "Detailed summary...",
-  "mcqs": [
-    {{"question": "Q1?", "options": ["A", "B", "C", "D"], "correct": 0}}
-  ]
-}}"""
-        
-        payload = {"contents": [{"parts": [{"text": prompt}]}]}
-        
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.post(url, json=payload)
-            response.raise_for_status()
-            data = response.json()
-            
-            if "candidates" not in data or not data["candidates"]:
-                raise ValueError("Invalid response from Gemini API")
-            
-            text_response = data["candidates"][0]["content"]["parts"][0]["text"]
-            start = text_response.find("{")
-            end = text_response.rfind("}") + 1
-            
-            if start == -1 or end == 0:
-                raise ValueError("No valid JSON found in Gemini response")
-                
-            json_str = text_response[start:end]
-            return json.loads(json_str)
-            
+{MODULE_JSON_FORMAT}"""
+        return _parse_module_json(await _generate_text(prompt))
+
+    except TooManyChunks:
+        # The caller's input, not a Gemini failure; routes turn it into a 400
+        raise
     except httpx.HTTPStatusError as e:
         logger.error(f"Gemini API HTTP error: {e.response.status_code} - {e.response.text}")
         raise Exception(f"Gemini API error: HTTP {e.response.status_code}")
@@ -0,0 +1,85 @@
+import asyncio
+import hashlib
+import json
+import logging
+import re
+from app.config.settings import settings
+from app.repositories.module_index_repository import ModuleIndexRepository
+from app.services.ai_module_generator import CHARS_PER_TOKEN
+from app.services.http_client import get_gemini_client
+from app.utils.lru_cache import TTLCache
+from app.services.retrieval_index import module_source, fingerprint, build_index, serialize_index, deserialize_index, select_chunks
+
+logger = logging.getLogger(__name__)
+
+CHAT_MODEL = "gemini-pro"
+PUNCTUATION_RE = re.compile(r"[^\w\s]+")
+
+answer_cache = TTLCache(settings.CHATBOT_CACHE_SIZE, settings.CHATBOT_CACHE_TTL_SECONDS)
+
+def normalize_question(question: str) -> str:
+    words = PUNCTUATION_RE.sub(" ", question.casefold()).split()
+    if settings.CHATBOT_CACHE_TOKEN_SET:
+        # Word order and repeats are ignored, so "what is X" and "X, what is it?" share an answer
+        words = sorted(set(words))
+    return " ".join(words)
+
+def answer_cache_key(module: dict, question: str) -> str:
+    # The fingerprint changes with the module's text, so edited modules never get stale answers
+    key = f"{module['id']}\0{fingerprint(module_source(module))}\0{normalize_question(question)}"
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+def get_answer_cache_stats() -> dict:
+    return answer_cache.stats()
+
+async def index_module(module: dict, db) -> dict:
+    """Build and store the retrieval index for a module; returns the in-memory index."""
+    source = module_source(module)
+    index = await asyncio.to_thread(build_index, source, settings.RETRIEVAL_CHUNK_TOKENS)
+    repo = ModuleIndexRepository(db)
+    await repo.save_index(module["id"], fingerprint(source), serialize_index(index))
+    return index
+
+async def load_module_index(module: dict, db) -> dict:
+    repo = ModuleIndexRepository(db)
+    stored = await repo.get_index(module["id"])
+    # Modules created before indexing existed, or edited since, are (re)indexed on first use
+    if stored and stored["fingerprint"] == fingerprint(module_source(module)):
+        return deserialize_index(stored["data"])
+    return await index_module(module, db)
+
+async def build_chat_prompt(module: dict, question: str, db) -> str:
+    index = await load_module_index(module, db)
+    excerpts = select_chunks(index, module_source(module), question, settings.CHATBOT_TOP_K, settings.CHATBOT_CONTEXT_TOKENS)
+
+    context = f"Module: {module['title']}\n"
+    if excerpts:
+        context += "Relevant excerpts:\n" + "\n---\n".join(excerpts) + "\n"
+    else:
+        # Nothing matched the question lexically; fall back to the start of the module
+        context += f"Content: {module['content'][:settings.CHATBOT_CONTEXT_TOKENS * CHARS_PER_TOKEN]}\n"
+
+    return f"{context}\n\nUser Question: {question}\n\nAnswer:"
+
+async def stream_chat_answer(prompt: str):
+    """Yield pieces of the answer as Gemini's streaming endpoint produces them.
+
+    Closing the generator closes the upstream response, so Gemini stops
+    generating tokens nobody will read.
+    """
+    url = f"/v1beta/models/{CHAT_MODEL}:streamGenerateContent?alt=sse&key={settings.GEMINI_API_KEY}"
+    payload = {"contents": [{"parts": [{"text": prompt}]}]}
+
+    client = get_gemini_client()
+    async with client.stream("POST", url, json=payload) as response:
+        if response.is_error:
+            await response.aread()
+            response.raise_for_status()
+        async for line in response.aiter_lines():
+            if not line.startswith("data:"):
+                continue
+            data = json.loads(line[len("data:"):])
+            for candidate in data.get("candidates", [])[:1]:
+                for part in candidate.get("content", {}).get("parts", []):
+                    if part.get("text"):
+                        yield part["text"]
@@ -0,0 +1,58 @@
+import hashlib
+import logging
+from app.config.database import release_connection
+from app.config.settings import settings
+from app.repositories.generation_cache_repository import GenerationCacheRepository
+from app.services.ai_module_generator import generate_module_with_gemini, PROMPT_VERSION
+from app.utils.lru_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+memory_cache = TTLCache(settings.GENERATION_CACHE_MEMORY_SIZE, settings.GENERATION_CACHE_TTL_SECONDS)
+
+def normalize_text(text: str) -> str:
+    return " ".join(text.split())
+
+def make_cache_key(extracted_text: str, model: str = None, prompt_version: str = PROMPT_VERSION, variant: str = "") -> str:
+    model = model or settings.GEMINI_MODEL
+    digest = hashlib.sha256()
+    for part in (model, prompt_version, variant, normalize_text(extracted_text)):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+async def get_or_generate_module(extracted_text: str, db, chunked: bool = False, chunk_tokens: int = None, max_parallel: int = None) -> tuple[dict, str]:
+    """Return `(ai_result, cache_status)` where cache_status is "hit" or "miss"."""
+    if not settings.GENERATION_CACHE_ENABLED:
+        await release_connection(db)
+        return await generate_module_with_gemini(extracted_text, chunked, chunk_tokens, max_parallel), "miss"
+
+    # Parallelism does not change the output, but the chunk size does
+    variant = f"chunked:{chunk_tokens or settings.GENERATION_CHUNK_TOKENS}" if chunked else ""
+    key = make_cache_key(extracted_text, variant=variant)
+    cached = memory_cache.get(key)
+    if cached is not None:
+        return cached, "hit"
+
+    repo = GenerationCacheRepository(db)
+    try:
+        cached = await repo.get(key)
+    except Exception as e:
+        logger.warning(f"Generation cache lookup failed: {str(e)}")
+        await repo.rollback()
+        cached = None
+    if cached is not None:
+        memory_cache.set(key, cached)
+        return cached, "hit"
+
+    # The lookup left a transaction open; do not hold its pooled connection through seconds of Gemini calls
+    await release_connection(db)
+    ai_result = await generate_module_with_gemini(extracted_text, chunked, chunk_tokens, max_parallel)
+    memory_cache.set(key, ai_result)
+    try:
+        await repo.set(key, settings.GEMINI_MODEL, PROMPT_VERSION, ai_result, settings.GENERATION_CACHE_TTL_SECONDS)
+        await repo.evict(settings.GENERATION_CACHE_MAX_ENTRIES)
+    except Exception as e:
+        logger.warning(f"Generation cache store failed: {str(e)}")
+        await repo.rollback()
+    return ai_result, "miss"
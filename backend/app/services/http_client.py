@@ -0,0 +1,55 @@
+import httpx
+import logging
+from app.config.settings import settings
+from app.services.metrics import InstrumentedTransport
+
+logger = logging.getLogger(__name__)
+
+GEMINI_BASE_URL = "https://generativelanguage.googleapis.com"
+YOUTUBE_BASE_URL = "https://www.googleapis.com"
+
+class HTTPClients:
+    gemini: httpx.AsyncClient = None
+    youtube: httpx.AsyncClient = None
+
+http_clients = HTTPClients()
+
+def _build_client(name: str, base_url: str, timeout: float) -> httpx.AsyncClient:
+    limits = httpx.Limits(
+        max_connections=settings.HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY
+    )
+    http2 = settings.HTTP2_ENABLED
+    if http2:
+        try:
+            import h2  # noqa: F401
+        except ImportError:
+            logger.warning("HTTP/2 requested but the 'h2' package is not installed, falling back to HTTP/1.1")
+            http2 = False
+    transport = httpx.AsyncHTTPTransport(limits=limits, http2=http2)
+    if settings.METRICS_ENABLED:
+        transport = InstrumentedTransport(name, transport)
+    return httpx.AsyncClient(base_url=base_url, timeout=timeout, transport=transport)
+
+async def start_http_clients():
+    http_clients.gemini = _build_client("gemini", GEMINI_BASE_URL, settings.GEMINI_TIMEOUT)
+    http_clients.youtube = _build_client("youtube", YOUTUBE_BASE_URL, settings.YOUTUBE_TIMEOUT)
+
+async def close_http_clients():
+    for name in ("gemini", "youtube"):
+        client = getattr(http_clients, name)
+        if client is not None:
+            await client.aclose()
+            setattr(http_clients, name, None)
+
+def get_gemini_client() -> httpx.AsyncClient:
+    # Created lazily so services still work outside the app lifecycle (scripts, shells)
+    if http_clients.gemini is None:
+        http_clients.gemini = _build_client("gemini", GEMINI_BASE_URL, settings.GEMINI_TIMEOUT)
+    return http_clients.gemini
+
+def get_youtube_client() -> httpx.AsyncClient:
+    if http_clients.youtube is None:
+        http_clients.youtube = _build_client("youtube", YOUTUBE_BASE_URL, settings.YOUTUBE_TIMEOUT)
+    return http_clients.youtube
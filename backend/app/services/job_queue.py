@@ -0,0 +1,177 @@
+import asyncio
+import logging
+import uuid
+import weakref
+from fastapi.encoders import jsonable_encoder
+from app.config.database import session_scope
+from app.config.settings import settings
+from app.repositories.job_repository import JobRepository
+from app.services.module_pipeline import build_module
+from app.services.metrics import registry, JOB_QUEUE_DEPTH
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = ("succeeded", "failed")
+
+async def _run_generate_module(job: dict, db, report) -> dict:
+    payload = job["payload"]
+    return await build_module(
+        payload["user_id"],
+        db,
+        extracted_text=payload.get("extracted_text"),
+        upload=payload.get("upload"),
+        pdf_text_limit=payload.get("pdf_text_limit"),
+        chunked=payload.get("chunked", False),
+        chunk_tokens=payload.get("chunk_tokens"),
+        max_parallel=payload.get("max_parallel"),
+        report=report
+    )
+
+JOB_HANDLERS = {
+    "generate_module": _run_generate_module
+}
+
+class JobQueue:
+    """Runs background jobs on JOB_WORKERS tasks per process.
+
+    A worker claims a job with a lease of JOB_LEASE_SECONDS and renews it
+    while the job runs. Every process periodically looks for running jobs
+    whose lease expired, i.e. whose worker crashed or was stopped, and
+    takes them over; a worker that loses its lease abandons the job.
+    """
+    def __init__(self):
+        self.queue: asyncio.Queue = None
+        self.workers: list[asyncio.Task] = []
+        self.sweeper: asyncio.Task = None
+        # Entries vanish with their last waiter, also for jobs another process finishes and never notifies here
+        self._updates: weakref.WeakValueDictionary[str, asyncio.Event] = weakref.WeakValueDictionary()
+        # Jobs queued or running in this process, so sweeps do not queue them twice
+        self._local: set[str] = set()
+
+    async def start(self):
+        self.queue = asyncio.Queue()
+        self.workers = [asyncio.create_task(self._worker()) for _ in range(settings.JOB_WORKERS)]
+        await self._queue_claimable()
+        self.sweeper = asyncio.create_task(self._sweep())
+
+    async def stop(self):
+        # Jobs interrupted here stay "running" in the DB and are taken over once their lease expires
+        tasks = self.workers + ([self.sweeper] if self.sweeper else [])
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.workers = []
+        self.sweeper = None
+
+    def depth(self) -> int:
+        return self.queue.qsize() if self.queue else 0
+
+    async def submit(self, db, user_id: str, kind: str, payload: dict) -> dict:
+        if kind not in JOB_HANDLERS:
+            raise ValueError(f"Unknown job kind: {kind}")
+        if self.queue is None:
+            raise RuntimeError("Job queue is not running")
+        job = await JobRepository(db).create_job(user_id, kind, payload)
+        self._enqueue(job["id"])
+        return job
+
+    async def wait_for_update(self, job_id: str, timeout: float):
+        """Wait until this process updates the job, or `timeout` elapses (jobs may run in another worker)."""
+        event = self._updates.setdefault(job_id, asyncio.Event())
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    def _notify(self, job_id: str):
+        event = self._updates.pop(job_id, None)
+        if event:
+            event.set()
+
+    def _enqueue(self, job_id: str):
+        self._local.add(job_id)
+        self.queue.put_nowait(job_id)
+
+    async def _queue_claimable(self):
+        async with session_scope() as db:
+            jobs = await JobRepository(db).get_claimable_jobs()
+        for job in jobs:
+            if job["id"] not in self._local:
+                logger.info(f"Resuming {job['status']} job {job['id']} ({job['kind']})")
+                self._enqueue(job["id"])
+
+    async def _sweep(self):
+        while True:
+            await asyncio.sleep(settings.JOB_LEASE_SECONDS)
+            try:
+                await self._queue_claimable()
+            except Exception as e:
+                logger.warning(f"Failed to look for abandoned jobs: {str(e)}")
+
+    async def _heartbeat(self, job_id: str, owner: str, work: asyncio.Task):
+        while True:
+            await asyncio.sleep(settings.JOB_LEASE_SECONDS / 3)
+            try:
+                # Its own handle: the job's session is busy in the handler
+                async with session_scope() as db:
+                    renewed = await JobRepository(db).renew_lease(job_id, owner)
+            except Exception as e:
+                logger.warning(f"Failed to renew the lease on job {job_id}: {str(e)}")
+                continue
+            if not renewed:
+                logger.warning(f"Lost the lease on job {job_id} to another worker; abandoning it")
+                work.cancel()
+                return
+
+    async def _worker(self):
+        while True:
+            job_id = await self.queue.get()
+            try:
+                await self._run(job_id)
+            except Exception as e:
+                logger.error(f"Job {job_id} crashed the worker loop: {str(e)}")
+            finally:
+                self._local.discard(job_id)
+                self.queue.task_done()
+
+    async def _run(self, job_id: str):
+        owner = uuid.uuid4().hex
+        async with session_scope() as db:
+            repo = JobRepository(db)
+            job = await repo.get_job(job_id)
+            if not job or job["status"] in TERMINAL_STATUSES:
+                return
+            if not await repo.claim_job(job_id, owner):
+                return
+            self._notify(job_id)
+
+            async def report(stage: str, progress: int):
+                await repo.update_job(job_id, stage=stage, progress=progress)
+                self._notify(job_id)
+
+            work = asyncio.create_task(JOB_HANDLERS[job["kind"]](job, db, report))
+            heartbeat = asyncio.create_task(self._heartbeat(job_id, owner, work))
+            try:
+                result = await work
+            except asyncio.CancelledError:
+                if heartbeat.done() and not heartbeat.cancelled():
+                    # The heartbeat lost the lease and abandoned the job; otherwise this worker is being stopped
+                    return
+                raise
+            except Exception as e:
+                logger.error(f"Job {job_id} failed: {str(e)}")
+                error = str(e)
+            else:
+                await repo.finish_job(job_id, owner, status="succeeded", stage="done", progress=100, result=jsonable_encoder(result))
+                self._notify(job_id)
+                return
+            finally:
+                heartbeat.cancel()
+
+        # Record the failure on a fresh handle, the job's own session may be unusable after the error
+        async with session_scope() as db:
+            await JobRepository(db).finish_job(job_id, owner, status="failed", error=error)
+        self._notify(job_id)
+
+job_queue = JobQueue()
+registry.add_collector(lambda: JOB_QUEUE_DEPTH.set(job_queue.depth()))
@@ -1,6 +1,79 @@
-def calculate_score(answers: list[int], correct_answers: list[int]) -> float:
-    if len(answers) != len(correct_answers):
+import numpy as np
+from app.config.settings import settings
+from app.repositories.module_repository import ModuleRepository
+from app.repositories.quiz_repository import QuizRepository
+from app.utils.lru_cache import TTLCache
+
+# Grades modules created before generated quizzes were stored
+LEGACY_ANSWER_KEY = (0, 1, 2, 0, 1)
+
+# module id -> (read-only answer key array, whether it comes from a stored quiz)
+answer_key_cache = TTLCache(settings.ANSWER_KEY_CACHE_SIZE, settings.ANSWER_KEY_CACHE_TTL_SECONDS)
+
+def split_mcqs(mcqs: list) -> tuple[list[dict], list[int]]:
+    """Split generated MCQs into client-safe questions and an answer key, dropping malformed ones."""
+    questions, answer_key = [], []
+    for mcq in mcqs or []:
+        if not isinstance(mcq, dict):
+            continue
+        options = mcq.get("options")
+        correct = mcq.get("correct")
+        if not isinstance(mcq.get("question"), str) or not isinstance(options, list) or not isinstance(correct, int) or not 0 <= correct < len(options):
+            continue
+        questions.append({"question": mcq["question"], "options": options})
+        answer_key.append(correct)
+    return questions, answer_key
+
+def _freeze(answer_key) -> np.ndarray:
+    key = np.asarray(answer_key, dtype=np.int64)
+    key.setflags(write=False)
+    return key
+
+async def store_quiz(module_id: str, mcqs: list, db) -> bool:
+    """Persist a module's generated quiz and warm the answer-key cache; False if no MCQ was usable."""
+    questions, answer_key = split_mcqs(mcqs)
+    if not answer_key:
+        return False
+    await QuizRepository(db).save_quiz(module_id, questions, answer_key)
+    answer_key_cache.set(str(module_id), (_freeze(answer_key), True))
+    return True
+
+async def get_answer_key(module_id: str, db):
+    """`(answer_key, from_stored_quiz)` for grading a module, or None if the module does not exist.
+
+    Hot modules are answered from memory, so grading them touches neither
+    the quiz nor the module in the database.
+    """
+    cached = answer_key_cache.get(module_id)
+    if cached is not None:
+        return cached
+    quiz = await QuizRepository(db).get_quiz(module_id)
+    if quiz:
+        entry = (_freeze(quiz["answer_key"]), True)
+    elif await ModuleRepository(db).module_exists(module_id):
+        entry = (_freeze(LEGACY_ANSWER_KEY), False)
+    else:
+        return None
+    answer_key_cache.set(module_id, entry)
+    return entry
+
+def grade_answers(answers, answer_key) -> tuple[np.ndarray, np.ndarray]:
+    """Grade a batch of submissions in one pass.
+
+    `answers` is (submissions, questions). Returns the scores in percent and
+    the (submissions, questions) boolean correctness matrix.
+    """
+    try:
+        answers = np.asarray(answers, dtype=np.int64)
+    except (ValueError, OverflowError) as e:
+        raise ValueError("Answer count mismatch") from e
+    key = np.asarray(answer_key, dtype=np.int64)
+    if answers.ndim != 2 or answers.shape[1] != key.shape[0]:
         raise ValueError("Answer count mismatch")
-    
-    correct = sum(1 for user_ans, correct_ans in zip(answers, correct_answers) if user_ans == correct_ans)
-    return (correct / len(correct_answers)) * 100
+    correct = answers == key
+    return correct.mean(axis=1) * 100, correct
+
+def calculate_score(answers: list[int], correct_answers) -> tuple[float, np.ndarray]:
+    """Score one submission; returns the percentage and the per-question correctness array."""
+    scores, correct = grade_answers([answers], correct_answers)
+    return float(scores[0]), correct[0]
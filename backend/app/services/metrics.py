@@ -0,0 +1,143 @@
+import asyncio
+import logging
+import time
+import httpx
+from pymongo import monitoring
+from sqlalchemy import event
+from app.config.settings import settings
+from app.config.sqlite import engine, read_engine
+from app.utils.metrics import Registry
+
+logger = logging.getLogger(__name__)
+
+registry = Registry(settings.METRICS_MULTIPROC_DIR or None, settings.METRICS_SNAPSHOT_SECONDS)
+
+REQUEST_LATENCY = registry.histogram("http_request_duration_seconds", "Time to handle an HTTP request, by route template and status", ("method", "route", "status"))
+UPSTREAM_LATENCY = registry.histogram("upstream_request_duration_seconds", "Time until an external API returned its response headers", ("upstream", "status"))
+UPSTREAM_ERRORS = registry.counter("upstream_errors_total", "External API calls that failed in transport or returned a 4xx/5xx status", ("upstream", "error"))
+DB_QUERY_LATENCY = registry.histogram("db_query_duration_seconds", "Time to execute one SQL statement or Mongo command", ("backend", "operation"))
+PIPELINE_STAGE_LATENCY = registry.histogram("module_pipeline_stage_seconds", "Time spent in each stage of building a module", ("stage",))
+DB_POOL_IN_USE = registry.gauge("db_pool_connections_in_use", "SQLite connections checked out of each engine's pool", ("engine",))
+JOB_QUEUE_DEPTH = registry.gauge("job_queue_depth", "Background jobs waiting for a worker")
+RESULT_BATCH_DEPTH = registry.gauge("result_batch_queue_depth", "Result submissions waiting for the next group commit")
+# The quota is tracked per process: N workers can together spend N x YOUTUBE_DAILY_QUOTA
+YOUTUBE_QUOTA_USED = registry.gauge("youtube_quota_used_units", "YouTube Data API units spent today (Pacific Time) by this worker's budget")
+YOUTUBE_QUOTA_REMAINING = registry.gauge("youtube_quota_remaining_units", "YouTube Data API units left in this worker's daily budget")
+YOUTUBE_CACHE_ENTRIES = registry.gauge("youtube_cache_entries", "Cached YouTube search results, including cached misses")
+YOUTUBE_IN_FLIGHT = registry.gauge("youtube_searches_in_flight", "YouTube searches currently waiting on the API")
+
+class MetricsMiddleware:
+    """ASGI middleware recording every HTTP request's latency under its route template, e.g. `/modules/{module_id}`.
+
+    Streaming responses are timed until their last chunk is sent.
+    """
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # The router stores the matched route in the shared scope; a fixed label keeps 404 probes from adding series
+            route = scope.get("route")
+            REQUEST_LATENCY.observe(time.perf_counter() - start, method=scope["method"], route=route.path if route else "unmatched", status=status)
+
+class InstrumentedTransport(httpx.AsyncBaseTransport):
+    """Wraps an httpx transport to time and count the calls made to one upstream API."""
+    def __init__(self, upstream: str, transport: httpx.AsyncBaseTransport):
+        self.upstream = upstream
+        self.transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        start = time.perf_counter()
+        try:
+            response = await self.transport.handle_async_request(request)
+        except Exception as e:
+            UPSTREAM_LATENCY.observe(time.perf_counter() - start, upstream=self.upstream, status="error")
+            UPSTREAM_ERRORS.inc(upstream=self.upstream, error=type(e).__name__)
+            raise
+        UPSTREAM_LATENCY.observe(time.perf_counter() - start, upstream=self.upstream, status=response.status_code)
+        if response.status_code >= 400:
+            UPSTREAM_ERRORS.inc(upstream=self.upstream, error=f"http_{response.status_code}")
+        return response
+
+    async def aclose(self):
+        await self.transport.aclose()
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._metrics_start = time.perf_counter()
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    operation = statement.lstrip().split(None, 1)[0].upper()
+    DB_QUERY_LATENCY.observe(time.perf_counter() - context._metrics_start, backend="sqlite", operation=operation)
+
+class MongoCommandTimer(monitoring.CommandListener):
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        DB_QUERY_LATENCY.observe(event.duration_micros / 1e6, backend="mongodb", operation=event.command_name)
+
+    def failed(self, event):
+        DB_QUERY_LATENCY.observe(event.duration_micros / 1e6, backend="mongodb", operation=event.command_name)
+
+_db_metrics_installed = False
+
+def _collect_pool_usage():
+    engines = {"writer": engine} if read_engine is engine else {"writer": engine, "reader": read_engine}
+    for name, pool_engine in engines.items():
+        checkedout = getattr(pool_engine.pool, "checkedout", None)
+        if checkedout:
+            DB_POOL_IN_USE.set(checkedout(), engine=name)
+
+def install_db_metrics():
+    """Time every SQL statement and Mongo command; call before the database connects."""
+    global _db_metrics_installed
+    if _db_metrics_installed:
+        return
+    _db_metrics_installed = True
+    if settings.DATABASE_TYPE == "sqlite":
+        for sql_engine in {engine, read_engine}:
+            event.listen(sql_engine.sync_engine, "before_cursor_execute", _before_cursor_execute)
+            event.listen(sql_engine.sync_engine, "after_cursor_execute", _after_cursor_execute)
+        registry.add_collector(_collect_pool_usage)
+    else:
+        # Applies to every MongoClient created from now on
+        monitoring.register(MongoCommandTimer())
+
+class SnapshotWriter:
+    """Writes this worker's metrics to the shared directory periodically, for whichever worker gets scraped."""
+    task: asyncio.Task = None
+
+    async def start(self):
+        if registry.multiproc_dir:
+            self.task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self.task:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+            registry.write_snapshot()
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.to_thread(registry.write_snapshot)
+            except Exception as e:
+                logger.warning(f"Failed to write metrics snapshot: {str(e)}")
+            await asyncio.sleep(registry.snapshot_interval)
+
+snapshot_writer = SnapshotWriter()
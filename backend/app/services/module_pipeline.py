@@ -0,0 +1,54 @@
+from app.repositories.module_repository import ModuleRepository
+from app.services.text_cache import extract_text_cached
+from app.services.generation_cache import get_or_generate_module
+from app.services.ai_module_generator import PROMPT_TEXT_CHARS
+from app.services.youtube_service import search_youtube_video
+from app.services.mcq_generator import store_quiz
+from app.services.metrics import PIPELINE_STAGE_LATENCY
+
+async def _no_progress(stage: str, progress: int):
+    pass
+
+async def build_module(user_id: str, db, extracted_text: str = None, upload: dict = None, pdf_text_limit: int = None, chunked: bool = False, chunk_tokens: int = None, max_parallel: int = None, report=_no_progress) -> dict:
+    """PDF -> text -> AI module -> YouTube video -> saved module.
+
+    Pass either `extracted_text` or `upload`, the dict returned by `store_upload`.
+    `chunked` generates from the whole text (see `generate_module_with_gemini`).
+
+    `report(stage, progress)` is awaited at the start of every stage so job
+    runners can publish progress; request handlers can leave it out.
+    """
+    if upload:
+        await report("extract", 10)
+        # Only parse what the prompt and the stored excerpt will use; without a limit the whole text is stored
+        budget = max(PROMPT_TEXT_CHARS, pdf_text_limit) if pdf_text_limit and not chunked else None
+        with PIPELINE_STAGE_LATENCY.time(stage="extract"):
+            extracted_text = await extract_text_cached(upload["path"], upload["sha256"], upload["size"], max_chars=budget)
+
+    await report("generate", 30)
+    with PIPELINE_STAGE_LATENCY.time(stage="generate"):
+        ai_result, cache_status = await get_or_generate_module(extracted_text, db, chunked, chunk_tokens, max_parallel)
+
+    await report("video", 70)
+    with PIPELINE_STAGE_LATENCY.time(stage="video"):
+        video_id = await search_youtube_video(ai_result["title"])
+
+    await report("save", 85)
+    with PIPELINE_STAGE_LATENCY.time(stage="save"):
+        repo = ModuleRepository(db)
+        module = await repo.create_module(
+            user_id,
+            ai_result["title"],
+            ai_result["content"],
+            extracted_text[:pdf_text_limit] if pdf_text_limit else extracted_text,
+            video_id
+        )
+        # Keep the answer key so submissions are graded against this module's own questions
+        await store_quiz(module["id"], ai_result["mcqs"], db)
+
+    return {
+        "module": module,
+        "mcqs": ai_result["mcqs"],
+        "video_id": video_id,
+        "cache": cache_status
+    }
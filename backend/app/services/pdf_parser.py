@@ -1,26 +1,142 @@
+import asyncio
+import multiprocessing
+import os
 import pdfplumber
 import logging
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from app.config.settings import settings
 
 logger = logging.getLogger(__name__)
 
-async def extract_text_from_pdf(file_path: str) -> str:
+# Part of the extracted-text cache key: bump when extraction output changes
+PARSER_VERSION = f"1-pdfplumber{pdfplumber.__version__}"
+
+_executor: ProcessPoolExecutor = None
+_executor_workers = 1
+
+def get_pdf_executor() -> ProcessPoolExecutor:
+    global _executor, _executor_workers
+    if _executor is None:
+        _executor_workers = settings.PDF_PROCESS_WORKERS or os.cpu_count() or 1
+        # spawn, not fork: the parent has live event-loop and DB driver threads
+        _executor = ProcessPoolExecutor(max_workers=_executor_workers, mp_context=multiprocessing.get_context("spawn"))
+    return _executor
+
+def start_pdf_executor():
+    get_pdf_executor()
+
+def shutdown_pdf_executor():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+def _count_pages(file_path: str) -> int:
+    with pdfplumber.open(file_path) as pdf:
+        return len(pdf.pages)
+
+def iter_pdf_pages(file_path: str, start: int = 0, end: int = None):
+    """Lazily yield the text of pages [start, end), skipping pages that fail or have no text."""
+    with pdfplumber.open(file_path) as pdf:
+        pages = pdf.pages[start:end]
+        for page_num, page in enumerate(pages, start + 1):
+            try:
+                page_text = page.extract_text()
+            except Exception as e:
+                logger.warning(f"Failed to extract text from page {page_num}: {str(e)}")
+                continue
+            finally:
+                # Drop pdfplumber's per-page layout caches as we go
+                page.close()
+            if page_text:
+                yield page_text
+
+def _extract_page_range(file_path: str, start: int, end: int, max_chars: int = None) -> list[str]:
+    """Runs in a worker process; stops early once `max_chars` characters are collected."""
+    texts = []
+    collected = 0
+    for page_text in iter_pdf_pages(file_path, start, end):
+        texts.append(page_text)
+        collected += len(page_text)
+        if max_chars is not None and collected >= max_chars:
+            break
+    return texts
+
+async def iter_pdf_text(file_path: str, max_chars_per_task: int = None):
+    """Async iterator over page texts in document order.
+
+    Pages are extracted one wave of pool tasks at a time, so a consumer that
+    stops iterating early never pays for the rest of the document.
+    """
+    loop = asyncio.get_running_loop()
+    executor = get_pdf_executor()
+    page_count = await loop.run_in_executor(executor, _count_pages, file_path)
+
+    # Start with small tasks and double them every wave: short budgets stop after a few pages,
+    # while reading a whole book re-opens the file only O(log pages) times
+    chunk = max(settings.PDF_MIN_PAGES_PER_TASK, 1)
+    next_page = 0
+    while next_page < page_count:
+        wave = []
+        for _ in range(_executor_workers):
+            if next_page >= page_count:
+                break
+            wave.append((next_page, min(next_page + chunk, page_count)))
+            next_page += chunk
+        parts = await asyncio.gather(*(
+            loop.run_in_executor(executor, _extract_page_range, file_path, start, end, max_chars_per_task)
+            for start, end in wave
+        ))
+        for part in parts:
+            for page_text in part:
+                yield page_text
+        chunk *= 2
+
+async def _extract_all_pages(file_path: str) -> list[str]:
+    loop = asyncio.get_running_loop()
+    executor = get_pdf_executor()
+    page_count = await loop.run_in_executor(executor, _count_pages, file_path)
+
+    # Every task re-opens the document, so use one range per worker rather than many small ones
+    chunk = max(settings.PDF_MIN_PAGES_PER_TASK, -(-page_count // _executor_workers), 1)
+    ranges = [(start, min(start + chunk, page_count)) for start in range(0, page_count, chunk)]
+    parts = await asyncio.gather(*(
+        loop.run_in_executor(executor, _extract_page_range, file_path, start, end)
+        for start, end in ranges
+    ))
+    return [page_text for part in parts for page_text in part]
+
+async def extract_text_from_pdf(file_path: str, max_chars: int = None) -> str:
+    """Extract the document text, or only its first `max_chars` characters when a budget is given."""
+    global _executor
     try:
-        text = ""
-        with pdfplumber.open(file_path) as pdf:
-            for page_num, page in enumerate(pdf.pages, 1):
-                try:
-                    page_text = page.extract_text()
-                    if page_text:
-                        text += page_text
-                except Exception as e:
-                    logger.warning(f"Failed to extract text from page {page_num}: {str(e)}")
-                    continue
-        
-        if not text.strip():
+        if max_chars is None:
+            pages = await _extract_all_pages(file_path)
+        else:
+            pages = []
+            collected = 0
+            page_iter = iter_pdf_text(file_path, max_chars)
+            try:
+                async for page_text in page_iter:
+                    pages.append(page_text)
+                    collected += len(page_text)
+                    if collected >= max_chars:
+                        break
+            finally:
+                await page_iter.aclose()
+
+        text = "".join(pages).strip()
+        if not text:
             raise ValueError("No readable text found in PDF")
-            
-        return text.strip()
-        
+
+        return text[:max_chars] if max_chars is not None else text
+
+    except BrokenProcessPool as e:
+        # A worker died (e.g. OOM on a hostile PDF); start a fresh pool for the next request
+        _executor = None
+        logger.error(f"PDF extraction failed for {file_path}: worker pool crashed")
+        raise Exception(f"PDF processing error: {str(e)}")
     except Exception as e:
         logger.error(f"PDF extraction failed for {file_path}: {str(e)}")
         raise Exception(f"PDF processing error: {str(e)}")
@@ -0,0 +1,72 @@
+import asyncio
+import cProfile
+import logging
+import os
+import random
+import re
+import secrets
+import time
+from pathlib import Path
+from app.config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+PROFILE_DIR = Path("app/storage/profiles")
+PROFILE_HEADER = "x-profile"
+
+def _should_profile(scope) -> bool:
+    if settings.PROFILING_ADMIN_TOKEN:
+        for name, value in scope["headers"]:
+            if name == PROFILE_HEADER.encode() and secrets.compare_digest(value, settings.PROFILING_ADMIN_TOKEN.encode()):
+                return True
+    return settings.PROFILING_SAMPLE_RATE > 0 and random.random() < settings.PROFILING_SAMPLE_RATE
+
+def _profile_name(scope) -> str:
+    path = re.sub(r"[^A-Za-z0-9]+", "_", scope["path"]).strip("_") or "root"
+    return f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{scope['method']}-{path[:80]}-{secrets.token_hex(3)}.prof"
+
+def _save(profile: cProfile.Profile, path: Path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    profile.dump_stats(path)
+    # Keep the newest PROFILING_MAX_FILES; the directory is a ring, not an archive
+    profiles = sorted(path.parent.glob("*.prof"), key=lambda p: p.stat().st_mtime)
+    for old in profiles[:-settings.PROFILING_MAX_FILES]:
+        old.unlink(missing_ok=True)
+
+class ProfilingMiddleware:
+    """ASGI middleware that runs cProfile over requests sent with the admin `X-Profile` header, or a random sample of them.
+
+    Each profile is saved as a pstats file in PROFILE_DIR, named in the
+    response's `X-Profile-Id` header; open it with `python -m pstats` or
+    snakeviz. cProfile sees the whole event loop thread, so coroutines of
+    other requests that run meanwhile show up too, and only one request is
+    profiled at a time. Work in the PDF processes and hashing threads
+    appears only as time waited on them. Only added when PROFILING_ENABLED.
+    """
+    def __init__(self, app):
+        self.app = app
+        self.active = False
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self.active or not _should_profile(scope):
+            await self.app(scope, receive, send)
+            return
+        name = _profile_name(scope)
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [(b"x-profile-id", name.encode())]
+            await send(message)
+
+        self.active = True
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            profile.disable()
+            self.active = False
+            try:
+                await asyncio.to_thread(_save, profile, PROFILE_DIR / name)
+            except Exception as e:
+                logger.warning(f"Failed to save profile {name}: {str(e)}")
@@ -1,13 +1,35 @@
+import math
 from typing import List
+from app.models.sql_models import TIME_BUCKET_COLUMNS
 
-def analyze_results(results: List[dict]) -> dict:
-    if not results:
-        return {"average_score": 0, "total_attempts": 0, "best_score": 0}
+def analyze_results(rollups: List[dict]) -> dict:
+    """Build a user's analytics from their per-module rollups (see `RollupRepository`)."""
+    if not rollups:
+        return {"average_score": 0, "total_attempts": 0, "best_score": 0, "modules": []}
     
-    scores = [r["score"] for r in results]
+    total_attempts = sum(r["attempts"] for r in rollups)
+    latest = max(rollups, key=lambda r: r["latest_at"])
     return {
-        "average_score": sum(scores) / len(scores),
-        "total_attempts": len(results),
-        "best_score": max(scores),
-        "latest_score": scores[-1] if scores else 0
+        "average_score": sum(r["score_sum"] for r in rollups) / total_attempts,
+        "total_attempts": total_attempts,
+        "best_score": max(r["best_score"] for r in rollups),
+        "latest_score": latest["latest_score"],
+        "modules": [
+            {"module_id": r["module_id"], "attempts": r["attempts"], "average_score": r["score_sum"] / r["attempts"], "best_score": r["best_score"]}
+            for r in rollups
+        ]
+    }
+
+def summarize_rollup(rollup: dict) -> dict:
+    attempts = rollup["attempts"]
+    mean = rollup["score_sum"] / attempts
+    # Population standard deviation from the running sums; clamp float error below zero
+    variance = max(rollup["score_sumsq"] / attempts - mean * mean, 0.0)
+    return {
+        "attempts": attempts,
+        "average_score": mean,
+        "score_stddev": math.sqrt(variance),
+        "best_score": rollup["best_score"],
+        "latest_score": rollup["latest_score"],
+        "time_histogram": {column: rollup[column] for column in TIME_BUCKET_COLUMNS}
     }
@@ -0,0 +1,82 @@
+import asyncio
+import logging
+from app.config.database import session_scope
+from app.config.settings import settings
+from app.repositories.result_repository import ResultRepository
+from app.services.metrics import registry, RESULT_BATCH_DEPTH
+
+logger = logging.getLogger(__name__)
+
+class ResultBatcher:
+    """Group-commits result inserts: rows arriving within a few milliseconds share one transaction.
+
+    A batch is written once it has RESULT_BATCH_MAX_ROWS rows or its first
+    row has waited RESULT_BATCH_MAX_DELAY_MS, whichever comes first. Each
+    caller gets its own inserted row back, or the batch's error.
+    """
+    def __init__(self):
+        self.queue: asyncio.Queue = None
+        self.task: asyncio.Task = None
+
+    @property
+    def running(self) -> bool:
+        return self.task is not None
+
+    def depth(self) -> int:
+        return self.queue.qsize() if self.queue else 0
+
+    async def start(self):
+        self.queue = asyncio.Queue()
+        self.task = asyncio.create_task(self._flusher())
+
+    async def stop(self):
+        if not self.task:
+            return
+        # Let the flusher drain what was already submitted before it is cancelled
+        await self.queue.join()
+        self.task.cancel()
+        await asyncio.gather(self.task, return_exceptions=True)
+        self.task = None
+
+    async def submit(self, user_id: str, module_id: str, score: float, total_questions: int, time_taken: int = None, correct: list[bool] = None) -> dict:
+        future = asyncio.get_running_loop().create_future()
+        row = {"user_id": user_id, "module_id": module_id, "score": score, "total_questions": total_questions, "time_taken": time_taken, "correct": correct}
+        await self.queue.put((row, future))
+        return await future
+
+    async def _flusher(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + settings.RESULT_BATCH_MAX_DELAY_MS / 1000
+            while len(batch) < settings.RESULT_BATCH_MAX_ROWS:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                await self._flush(batch)
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+    async def _flush(self, batch: list):
+        try:
+            async with session_scope() as db:
+                results = await ResultRepository(db).create_results([row for row, _ in batch])
+        except Exception as e:
+            logger.error(f"Result batch of {len(batch)} failed: {str(e)}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), result in zip(batch, results):
+            # The request may have been cancelled while waiting; its row is stored regardless
+            if not future.done():
+                future.set_result(result)
+
+result_batcher = ResultBatcher()
+registry.add_collector(lambda: RESULT_BATCH_DEPTH.set(result_batcher.depth()))
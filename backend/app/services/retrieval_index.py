@@ -0,0 +1,139 @@
+import hashlib
+import io
+import re
+import numpy as np
+from app.services.ai_module_generator import CHARS_PER_TOKEN
+
+INDEX_VERSION = 1
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+WORD_RE = re.compile(r"\S+")
+STOPWORDS = frozenset(
+    "a an and are as at be but by for from has have how i in is it its of on or that the this to was what when where "
+    "which who why will with you your do does did can".split()
+)
+# Standard BM25 parameters
+K1 = 1.5
+B = 0.75
+
+def tokenize(text: str) -> list[str]:
+    return [t for t in TOKEN_RE.findall(text.lower()) if t not in STOPWORDS]
+
+def module_source(module: dict) -> str:
+    """The text a module's index is built over; chunk offsets point into this string."""
+    return f"{module['content']}\n\n{module.get('pdf_text') or ''}"
+
+def fingerprint(source: str) -> str:
+    return hashlib.sha1(f"{INDEX_VERSION}:{source}".encode("utf-8")).hexdigest()
+
+def _chunk_offsets(source: str, chunk_tokens: int) -> np.ndarray:
+    """(start, end) character spans of overlapping word windows of about `chunk_tokens` tokens."""
+    spans = [m.span() for m in WORD_RE.finditer(source)]
+    if not spans:
+        return np.zeros((0, 2), dtype=np.int64)
+    # Words run a little longer than tokens; a quarter overlap keeps answers from being cut in half
+    window = max(1, int(chunk_tokens * 0.75))
+    step = max(1, window - window // 4)
+    offsets = []
+    for start in range(0, len(spans), step):
+        end = min(start + window, len(spans))
+        offsets.append((spans[start][0], spans[end - 1][1]))
+        if end == len(spans):
+            break
+    return np.asarray(offsets, dtype=np.int64)
+
+def build_index(source: str, chunk_tokens: int) -> dict:
+    offsets = _chunk_offsets(source, chunk_tokens)
+    vocab: dict[str, int] = {}
+    term_ids, doc_ids = [], []
+    doc_len = np.zeros(len(offsets), dtype=np.int32)
+    for doc, (start, end) in enumerate(offsets):
+        tokens = tokenize(source[start:end])
+        doc_len[doc] = len(tokens)
+        for token in tokens:
+            term_ids.append(vocab.setdefault(token, len(vocab)))
+            doc_ids.append(doc)
+
+    # CSR postings: for term t, doc_ids[indptr[t]:indptr[t + 1]] are the chunks containing it, tfs their counts
+    if term_ids:
+        pairs = np.stack([np.asarray(term_ids, dtype=np.int64), np.asarray(doc_ids, dtype=np.int64)])
+        # Sorted by (term, chunk), with the count of each pair being its term frequency
+        (terms, docs), tfs = np.unique(pairs, axis=1, return_counts=True)
+    else:
+        terms = docs = tfs = np.zeros(0, dtype=np.int64)
+    indptr = np.zeros(len(vocab) + 1, dtype=np.int64)
+    np.add.at(indptr, terms + 1, 1)
+    np.cumsum(indptr, out=indptr)
+    return {
+        "vocab": vocab,
+        "indptr": indptr,
+        "doc_ids": docs.astype(np.int32),
+        "tfs": tfs.astype(np.float32),
+        "doc_len": doc_len,
+        "offsets": offsets
+    }
+
+def serialize_index(index: dict) -> bytes:
+    buffer = io.BytesIO()
+    terms = sorted(index["vocab"], key=index["vocab"].get)
+    np.savez_compressed(
+        buffer,
+        vocab=np.frombuffer("\n".join(terms).encode("utf-8"), dtype=np.uint8),
+        indptr=index["indptr"],
+        doc_ids=index["doc_ids"],
+        tfs=index["tfs"],
+        doc_len=index["doc_len"],
+        offsets=index["offsets"]
+    )
+    return buffer.getvalue()
+
+def deserialize_index(data: bytes) -> dict:
+    with np.load(io.BytesIO(data)) as arrays:
+        raw_vocab = arrays["vocab"].tobytes().decode("utf-8")
+        terms = raw_vocab.split("\n") if raw_vocab else []
+        return {
+            "vocab": {term: i for i, term in enumerate(terms)},
+            "indptr": arrays["indptr"],
+            "doc_ids": arrays["doc_ids"],
+            "tfs": arrays["tfs"],
+            "doc_len": arrays["doc_len"],
+            "offsets": arrays["offsets"]
+        }
+
+def score(index: dict, query: str) -> np.ndarray:
+    doc_len = index["doc_len"].astype(np.float32)
+    scores = np.zeros(len(doc_len), dtype=np.float32)
+    if not len(doc_len):
+        return scores
+    avg_len = max(float(doc_len.mean()), 1.0)
+    norm = K1 * (1 - B + B * doc_len / avg_len)
+    n_docs = len(doc_len)
+    for term in set(tokenize(query)):
+        term_id = index["vocab"].get(term)
+        if term_id is None:
+            continue
+        lo, hi = index["indptr"][term_id], index["indptr"][term_id + 1]
+        docs = index["doc_ids"][lo:hi]
+        tfs = index["tfs"][lo:hi]
+        idf = np.log(1 + (n_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+        # Each chunk appears once per term slice, so plain fancy-index accumulation is safe
+        scores[docs] += idf * tfs * (K1 + 1) / (tfs + norm[docs])
+    return scores
+
+def select_chunks(index: dict, source: str, query: str, top_k: int, token_budget: int) -> list[str]:
+    """Best-scoring chunks for `query`, at most `top_k` and within `token_budget`, in document order."""
+    scores = score(index, query)
+    chosen = []
+    used = 0
+    for doc in np.argsort(-scores, kind="stable"):
+        if len(chosen) >= top_k or scores[doc] <= 0:
+            break
+        start, end = index["offsets"][doc]
+        cost = (end - start) // CHARS_PER_TOKEN
+        if used + cost > token_budget:
+            continue
+        # Neighbouring windows overlap; don't spend budget on the same text twice
+        if any(start < index["offsets"][other][1] and index["offsets"][other][0] < end for other in chosen):
+            continue
+        chosen.append(int(doc))
+        used += cost
+    return [source[index["offsets"][doc][0]:index["offsets"][doc][1]] for doc in sorted(chosen)]
@@ -0,0 +1,77 @@
+import asyncio
+import json
+import logging
+import zlib
+from pathlib import Path
+from app.services.pdf_parser import extract_text_from_pdf, PARSER_VERSION
+from app.utils.files import atomic_write
+
+logger = logging.getLogger(__name__)
+
+TEXT_CACHE_DIR = Path("app/storage/text_cache")
+
+class TextCacheStats:
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+
+    def to_dict(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "parser_version": PARSER_VERSION,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            # PDF bytes that did not have to be parsed again
+            "bytes_saved": self.bytes_saved
+        }
+
+stats = TextCacheStats()
+
+def _entry_path(sha256: str) -> Path:
+    return TEXT_CACHE_DIR / sha256[:2] / f"{sha256}.{PARSER_VERSION}.z"
+
+def _read_entry(sha256: str):
+    path = _entry_path(sha256)
+    try:
+        return json.loads(zlib.decompress(path.read_bytes()))
+    except FileNotFoundError:
+        # Entries written by other parser versions can never be used again
+        for stale in path.parent.glob(f"{sha256}.*.z"):
+            stale.unlink(missing_ok=True)
+        return None
+
+def _write_entry(sha256: str, entry: dict):
+    atomic_write(_entry_path(sha256), [zlib.compress(json.dumps(entry).encode("utf-8"))])
+
+async def extract_text_cached(file_path: str, sha256: str, size: int = 0, max_chars: int = None) -> str:
+    """`extract_text_from_pdf` backed by a compressed on-disk cache keyed by the file's SHA-256.
+
+    Budgeted extractions are cached as partial entries; they satisfy later
+    requests with an equal or smaller budget and are upgraded when more
+    text is extracted.
+    """
+    try:
+        entry = await asyncio.to_thread(_read_entry, sha256)
+    except Exception as e:
+        logger.warning(f"Text cache read failed for {sha256}: {str(e)}")
+        entry = None
+
+    if entry and (entry["complete"] or (max_chars is not None and len(entry["text"]) >= max_chars)):
+        stats.hits += 1
+        stats.bytes_saved += size
+        return entry["text"][:max_chars] if max_chars is not None else entry["text"]
+
+    stats.misses += 1
+    text = await extract_text_from_pdf(file_path, max_chars=max_chars)
+    # A budgeted extraction that came back short means the whole document was read
+    complete = max_chars is None or len(text) < max_chars
+    try:
+        await asyncio.to_thread(_write_entry, sha256, {"text": text, "complete": complete})
+    except Exception as e:
+        logger.warning(f"Text cache write failed for {sha256}: {str(e)}")
+    return text
+
+def get_text_cache_stats() -> dict:
+    return stats.to_dict()
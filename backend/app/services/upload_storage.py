@@ -0,0 +1,58 @@
+import asyncio
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+from fastapi import UploadFile
+
+UPLOAD_ROOT = Path("app/storage/uploads")
+OBJECTS_DIR = UPLOAD_ROOT / "objects"
+CHUNK_SIZE = 1024 * 1024
+
+class UploadTooLarge(Exception):
+    pass
+
+def object_path(sha256: str) -> Path:
+    # Two-level fan-out keeps directories small once there are many files
+    return OBJECTS_DIR / sha256[:2] / f"{sha256}.pdf"
+
+async def store_upload(file: UploadFile, max_bytes: int) -> dict:
+    """Stream an upload into content-addressed storage, hashing it on the way.
+
+    Chunks go to a temp file in OBJECTS_DIR as they arrive, so memory use
+    stays at one chunk whatever the file size. Once the hash is known the
+    temp file is renamed into place, or dropped if the object already exists.
+    """
+    if file.size is not None and file.size > max_bytes:
+        raise UploadTooLarge(f"File exceeds the {max_bytes} byte upload limit")
+
+    OBJECTS_DIR.mkdir(parents=True, exist_ok=True)
+    # Same filesystem as the objects, so the final rename is atomic
+    fd, tmp_path = tempfile.mkstemp(dir=OBJECTS_DIR, suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as buffer:
+            digest = hashlib.sha256()
+            size = 0
+            while chunk := await file.read(CHUNK_SIZE):
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLarge(f"File exceeds the {max_bytes} byte upload limit")
+                digest.update(chunk)
+                await asyncio.to_thread(buffer.write, chunk)
+
+        sha256 = digest.hexdigest()
+        path = object_path(sha256)
+        deduplicated = path.exists()
+        if deduplicated:
+            os.unlink(tmp_path)
+        else:
+            path.parent.mkdir(exist_ok=True)
+            os.replace(tmp_path, path)
+    except BaseException:
+        Path(tmp_path).unlink(missing_ok=True)
+        raise
+
+    return {"sha256": sha256, "size": size, "path": str(path), "deduplicated": deduplicated}
+
+def discard_object(sha256: str):
+    object_path(sha256).unlink(missing_ok=True)
@@ -1,12 +1,64 @@
+import asyncio
 import httpx
 import logging
+from datetime import datetime
+from zoneinfo import ZoneInfo
 from app.config.settings import settings
+from app.services.http_client import get_youtube_client
+from app.services.metrics import registry, YOUTUBE_QUOTA_USED, YOUTUBE_QUOTA_REMAINING, YOUTUBE_CACHE_ENTRIES, YOUTUBE_IN_FLIGHT
+from app.utils.lru_cache import TTLCache
 
 logger = logging.getLogger(__name__)
 
-async def search_youtube_video(query: str) -> str:
+# YouTube Data API quotas reset at midnight Pacific Time
+QUOTA_TIMEZONE = ZoneInfo("America/Los_Angeles")
+
+class QuotaTracker:
+    def __init__(self, daily_budget: int):
+        self.daily_budget = daily_budget
+        self.day = None
+        self.used = 0
+
+    def _roll_over(self):
+        today = datetime.now(QUOTA_TIMEZONE).date()
+        if today != self.day:
+            self.day = today
+            self.used = 0
+
+    def try_spend(self, units: int) -> bool:
+        self._roll_over()
+        if self.used + units > self.daily_budget:
+            return False
+        self.used += units
+        return True
+
+    def exhaust(self):
+        self._roll_over()
+        self.used = self.daily_budget
+
+    def stats(self) -> dict:
+        self._roll_over()
+        return {"day": str(self.day), "used": self.used, "remaining": self.daily_budget - self.used}
+
+quota = QuotaTracker(settings.YOUTUBE_DAILY_QUOTA)
+video_cache = TTLCache(settings.YOUTUBE_CACHE_SIZE, settings.YOUTUBE_CACHE_TTL_SECONDS)
+_in_flight: dict[str, asyncio.Future] = {}
+
+def _normalize_query(query: str) -> str:
+    return " ".join(query.casefold().split())
+
+def _is_quota_error(response: httpx.Response) -> bool:
+    if response.status_code != 403:
+        return False
+    try:
+        errors = response.json().get("error", {}).get("errors", [])
+    except ValueError:
+        return False
+    return any(e.get("reason") in ("quotaExceeded", "dailyLimitExceeded", "rateLimitExceeded") for e in errors)
+
+async def _fetch_video_id(query: str) -> str:
     try:
-        url = "https://www.googleapis.com/youtube/v3/search"
+        url = "/youtube/v3/search"
         params = {
             "part": "snippet",
             "q": query,
@@ -14,21 +66,74 @@ async def search_youtube_video(query: str) -> str:
             "maxResults": 1,
             "key": settings.YOUTUBE_API_KEY
         }
-        
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.get(url, params=params)
-            response.raise_for_status()
-            data = response.json()
-            
-            if not data.get("items"):
-                logger.warning(f"No YouTube videos found for query: {query}")
-                return None
-                
-            return data["items"][0]["id"]["videoId"]
-            
+
+        client = get_youtube_client()
+        response = await client.get(url, params=params)
+        if _is_quota_error(response):
+            logger.warning("YouTube API quota exhausted, skipping video lookups until reset")
+            quota.exhaust()
+            return None
+        response.raise_for_status()
+        data = response.json()
+
+        if not data.get("items"):
+            logger.warning(f"No YouTube videos found for query: {query}")
+            return None
+
+        return data["items"][0]["id"]["videoId"]
+
     except httpx.HTTPStatusError as e:
         logger.error(f"YouTube API HTTP error: {e.response.status_code} - {e.response.text}")
         raise Exception(f"YouTube API error: HTTP {e.response.status_code}")
     except Exception as e:
         logger.error(f"YouTube API call failed: {str(e)}")
         raise Exception(f"YouTube search failed: {str(e)}")
+
+async def search_youtube_video(query: str) -> str:
+    key = _normalize_query(query)
+    # Entries are wrapped in a tuple so cached "no result" lookups are distinguishable from misses
+    cached = video_cache.get(key)
+    if cached is not None:
+        return cached[0]
+
+    pending = _in_flight.get(key)
+    if pending is not None:
+        return await asyncio.shield(pending)
+
+    if not quota.try_spend(settings.YOUTUBE_SEARCH_COST):
+        logger.warning(f"YouTube daily quota budget spent, returning no video for query: {query}")
+        return None
+
+    future = asyncio.get_running_loop().create_future()
+    _in_flight[key] = future
+    try:
+        video_id = await _fetch_video_id(query)
+    except asyncio.CancelledError:
+        # Only this caller was cancelled; fail the others waiting on the same query instead of leaving them blocked forever
+        future.set_exception(Exception("YouTube search failed: the request making it was cancelled"))
+        future.exception()
+        raise
+    except Exception as e:
+        future.set_exception(e)
+        # Mark retrieved so the event loop does not log it when nobody else was waiting
+        future.exception()
+        raise
+    else:
+        ttl = settings.YOUTUBE_CACHE_TTL_SECONDS if video_id else settings.YOUTUBE_NEGATIVE_CACHE_TTL_SECONDS
+        video_cache.set(key, (video_id,), ttl=ttl)
+        future.set_result(video_id)
+        return video_id
+    finally:
+        _in_flight.pop(key, None)
+
+def get_youtube_stats() -> dict:
+    return {"quota": quota.stats(), "cache": video_cache.stats(), "in_flight": len(_in_flight)}
+
+def _collect_youtube_stats():
+    stats = get_youtube_stats()
+    YOUTUBE_QUOTA_USED.set(stats["quota"]["used"])
+    YOUTUBE_QUOTA_REMAINING.set(stats["quota"]["remaining"])
+    YOUTUBE_CACHE_ENTRIES.set(stats["cache"]["size"])
+    YOUTUBE_IN_FLIGHT.set(stats["in_flight"])
+
+registry.add_collector(_collect_youtube_stats)
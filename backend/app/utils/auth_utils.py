@@ -1,9 +1,44 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
 from passlib.context import CryptContext
+from app.config.settings import settings
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.BCRYPT_ROUNDS)
 
-def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+# bcrypt releases the GIL, so hashing on threads keeps the event loop free without a process pool
+_workers = settings.PASSWORD_HASH_WORKERS or max(1, (os.cpu_count() or 1) // 2)
+_executor: ThreadPoolExecutor = None
+# Requests beyond the pool's size wait here rather than queueing inside the executor, where a disconnected client's hash would still run
+_semaphore = asyncio.Semaphore(_workers)
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+def get_password_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=_workers, thread_name_prefix="password-hash")
+    return _executor
+
+def shutdown_password_executor():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+async def _run(fn, *args):
+    async with _semaphore:
+        return await asyncio.get_running_loop().run_in_executor(get_password_executor(), fn, *args)
+
+async def hash_password(password: str) -> str:
+    return await _run(pwd_context.hash, password)
+
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    return await _run(pwd_context.verify, plain_password, hashed_password)
+
+async def verify_and_update(plain_password: str, hashed_password: str) -> tuple[bool, Optional[str]]:
+    """Verify a password and, if its hash uses outdated settings (e.g. fewer BCRYPT_ROUNDS), rehash it.
+
+    Returns `(valid, new_hash)`; `new_hash` is None unless the caller should
+    store it in place of the old one.
+    """
+    return await _run(pwd_context.verify_and_update, plain_password, hashed_password)
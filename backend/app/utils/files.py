@@ -0,0 +1,17 @@
+import os
+import tempfile
+from pathlib import Path
+from typing import Iterable
+
+def atomic_write(path: Path, chunks: Iterable[bytes]):
+    """Write `chunks` to `path` through a temp file + rename, so readers never see a partial file."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as buffer:
+            for chunk in chunks:
+                buffer.write(chunk)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
@@ -0,0 +1,194 @@
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Optional
+import orjson
+from app.utils.files import atomic_write
+
+# Seconds; spans a cache hit to a slow Gemini generation
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+class Metric:
+    type = None
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: dict[tuple, object] = {}
+        # Updated from the event loop and from driver threads (motor runs pymongo on a thread pool)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> list:
+        with self._lock:
+            return [[list(key), value] for key, value in self._values.items()]
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+class Gauge(Metric):
+    type = "gauge"
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        # Per-bucket (not cumulative) counts, the last one for +Inf; render() accumulates them
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self) -> list:
+        with self._lock:
+            return [[list(key), [list(counts), total, count]] for key, (counts, total, count) in self._values.items()]
+
+class Registry:
+    """In-process metrics, rendered in the Prometheus text format.
+
+    With `multiproc_dir` set, every worker process writes its snapshot to
+    `<dir>/<pid>.json` and `render` merges all of them, so a scrape that
+    lands on any one uvicorn worker reports the whole server. Workers must
+    call `write_snapshot` every `snapshot_interval` seconds. Counters and
+    histograms of exited workers are kept, so totals never go backwards;
+    gauges are dropped once a worker's snapshot is three intervals old.
+    Empty the directory when the server restarts.
+    """
+    def __init__(self, multiproc_dir: Optional[str] = None, snapshot_interval: float = 5.0):
+        self.metrics: dict[str, Metric] = {}
+        self.collectors: list[Callable[[], None]] = []
+        self.multiproc_dir = Path(multiproc_dir) if multiproc_dir else None
+        self.snapshot_interval = snapshot_interval
+
+    def register(self, metric: Metric) -> Metric:
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: tuple = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: tuple = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: tuple = (), buckets: tuple = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def add_collector(self, collector: Callable[[], None]):
+        """Register a callback that refreshes gauges right before every snapshot."""
+        self.collectors.append(collector)
+
+    def snapshot(self) -> dict:
+        for collector in self.collectors:
+            collector()
+        return {
+            name: {
+                "type": metric.type,
+                "help": metric.documentation,
+                "labelnames": list(metric.labelnames),
+                "buckets": list(getattr(metric, "buckets", ())),
+                "samples": metric.samples()
+            }
+            for name, metric in self.metrics.items()
+        }
+
+    def write_snapshot(self):
+        if self.multiproc_dir:
+            atomic_write(self.multiproc_dir / f"{os.getpid()}.json", [orjson.dumps(self.snapshot())])
+
+    def collect(self) -> dict:
+        """This process's snapshot, merged with the other workers' in multi-process mode."""
+        if not self.multiproc_dir:
+            return self.snapshot()
+        self.write_snapshot()
+        merged = {}
+        now = time.time()
+        for path in self.multiproc_dir.glob("*.json"):
+            try:
+                # By age rather than by pid, which may be reused and cannot be probed portably
+                alive = now - path.stat().st_mtime < 3 * self.snapshot_interval
+                snapshot = orjson.loads(path.read_bytes())
+            except (OSError, orjson.JSONDecodeError):
+                continue
+            _merge(merged, snapshot, alive)
+        return merged
+
+    def render(self) -> str:
+        lines = []
+        for name, metric in sorted(self.collect().items()):
+            lines.append(f"# HELP {name} {metric['help']}")
+            lines.append(f"# TYPE {name} {metric['type']}")
+            for label_values, value in metric["samples"]:
+                labels = list(zip(metric["labelnames"], label_values))
+                if metric["type"] == "histogram":
+                    counts, total, count = value
+                    cumulative = 0
+                    for bound, bucket_count in zip(metric["buckets"] + ["+Inf"], counts):
+                        cumulative += bucket_count
+                        lines.append(f"{name}_bucket{_labels(labels + [('le', _number(bound))])} {cumulative}")
+                    lines.append(f"{name}_sum{_labels(labels)} {_number(total)}")
+                    lines.append(f"{name}_count{_labels(labels)} {count}")
+                else:
+                    lines.append(f"{name}{_labels(labels)} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+def _merge(merged: dict, snapshot: dict, alive: bool):
+    for name, metric in snapshot.items():
+        if metric["type"] == "gauge" and not alive:
+            continue
+        target = merged.setdefault(name, {**metric, "samples": []})
+        samples = {tuple(labels): value for labels, value in target["samples"]}
+        for labels, value in metric["samples"]:
+            key = tuple(labels)
+            current = samples.get(key)
+            if current is None:
+                samples[key] = value
+            elif metric["type"] == "histogram":
+                samples[key] = [[a + b for a, b in zip(current[0], value[0])], current[1] + value[1], current[2] + value[2]]
+            else:
+                # Gauges add up too: queue depths and pool checkouts of all workers make the server's total
+                samples[key] = current + value
+        target["samples"] = [[list(key), value] for key, value in samples.items()]
+
+def _labels(labels: list) -> str:
+    if not labels:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n") for _, value in labels)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(labels, escaped)) + "}"
+
+def _number(value) -> str:
+    if isinstance(value, str):
+        return value
+    return repr(float(value))
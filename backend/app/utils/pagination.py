@@ -0,0 +1,48 @@
+import base64
+import json
+from datetime import datetime
+from bson import ObjectId
+from sqlalchemy import and_, or_
+
+class InvalidCursor(ValueError):
+    pass
+
+def encode_cursor(created_at: datetime, id: str) -> str:
+    raw = json.dumps([created_at.isoformat(), str(id)]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str) -> tuple[datetime, str]:
+    """Inverse of `encode_cursor`; raises InvalidCursor for anything it did not produce."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, id = json.loads(raw)
+        return datetime.fromisoformat(created_at), str(id)
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor("Invalid pagination cursor") from e
+
+def make_page(items: list[dict], limit: int) -> dict:
+    """Trim a `limit + 1` row fetch to a page; the extra row only signals that another page exists."""
+    if len(items) <= limit:
+        return {"items": items, "next_cursor": None}
+    items = items[:limit]
+    last = items[-1]
+    return {"items": items, "next_cursor": encode_cursor(last["created_at"], last["id"])}
+
+def sql_after(created_column, id_column, cursor: str):
+    """WHERE clause selecting rows strictly after `cursor` in (created_at, id) order."""
+    created_at, id = decode_cursor(cursor)
+    try:
+        id = int(id)
+    except ValueError as e:
+        raise InvalidCursor("Invalid pagination cursor") from e
+    return or_(created_column > created_at, and_(created_column == created_at, id_column > id))
+
+def mongo_after(cursor: str) -> dict:
+    """Filter selecting documents strictly after `cursor` in (created_at, _id) order."""
+    created_at, id = decode_cursor(cursor)
+    if not ObjectId.is_valid(id):
+        raise InvalidCursor("Invalid pagination cursor")
+    return {"$or": [
+        {"created_at": {"$gt": created_at}},
+        {"created_at": created_at, "_id": {"$gt": ObjectId(id)}}
+    ]}
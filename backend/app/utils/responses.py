@@ -0,0 +1,13 @@
+import orjson
+from fastapi.responses import JSONResponse
+
+class ORJSONResponse(JSONResponse):
+    """JSON response rendered by orjson, which handles datetimes and NumPy values natively.
+
+    Returning one from a route skips FastAPI's response handling: no
+    `response_model` validation and no `jsonable_encoder` walk. Only use it
+    for content the repositories already built with the schema's exact
+    fields and types; `response_model` then only documents the route.
+    """
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
@@ -0,0 +1,21 @@
+import json
+from fastapi.encoders import jsonable_encoder
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "Connection": "keep-alive",
+    # Stop nginx-style proxies from buffering the stream
+    "X-Accel-Buffering": "no"
+}
+
+def format_sse(data, event: str = None) -> str:
+    message = ""
+    if event:
+        message += f"event: {event}\n"
+    payload = json.dumps(jsonable_encoder(data))
+    for line in payload.splitlines():
+        message += f"data: {line}\n"
+    return message + "\n"
+
+def sse_comment(text: str = "keep-alive") -> str:
+    return f": {text}\n\n"
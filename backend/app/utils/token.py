@@ -1,16 +1,53 @@
+import logging
+import time
 from datetime import datetime, timedelta
-from jose import JWTError, jwt
 from app.config.settings import settings
+from app.utils.lru_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+def _load_backend():
+    """The JWT library as `(module, error class)`; both expose the same encode/decode calls."""
+    if settings.JWT_BACKEND == "pyjwt":
+        try:
+            import jwt
+            return jwt, jwt.PyJWTError
+        except ImportError:
+            logger.warning("JWT_BACKEND=pyjwt but the 'pyjwt' package is not installed, falling back to python-jose")
+    from jose import JWTError, jwt
+    return jwt, JWTError
+
+_jwt, _jwt_error = _load_backend()
+
+# token -> verified claims, each entry expiring with the token's own `exp`
+token_cache = TTLCache(settings.TOKEN_CACHE_SIZE)
 
 def create_access_token(data: dict):
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     to_encode.update({"exp": expire})
-    return jwt.encode(to_encode, settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM)
+    return _jwt.encode(to_encode, settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM)
 
 def verify_token(token: str):
-    try:
-        payload = jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM])
+    """The token's claims, or None if it is invalid or expired.
+
+    Verified tokens are remembered until they expire, so a client reusing its
+    bearer token pays for the signature check once. Rejected tokens are not
+    cached. The returned dict is shared; do not modify it.
+    """
+    payload = token_cache.get(token)
+    if payload is not None:
         return payload
-    except JWTError:
+    try:
+        payload = _jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM])
+    except _jwt_error:
         return None
+    # A token without an expiry is still valid, it just has to be verified every time
+    if isinstance(payload.get("exp"), (int, float)):
+        ttl = payload["exp"] - time.time()
+        if ttl > 0:
+            token_cache.set(token, payload, ttl=ttl)
+    return payload
+
+def get_token_cache_stats() -> dict:
+    return token_cache.stats()
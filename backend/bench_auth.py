@@ -0,0 +1,75 @@
+import argparse
+import asyncio
+import time
+import httpx
+from fastapi import Depends, FastAPI
+from app.routes.dependencies import get_current_user
+from app.utils import token
+
+app = FastAPI()
+
+@app.get("/whoami")
+async def whoami(user_id: str = Depends(get_current_user)):
+    return {"user_id": user_id}
+
+async def run_requests(client: httpx.AsyncClient, tokens: list[str], concurrency: int) -> tuple[float, list[float]]:
+    """Send one GET per token, `concurrency` at a time; returns the wall time and each request's latency."""
+    latencies = []
+    pending = iter(tokens)
+
+    async def worker():
+        for bearer in pending:
+            start = time.perf_counter()
+            response = await client.get("/whoami", headers={"Authorization": f"Bearer {bearer}"})
+            latencies.append(time.perf_counter() - start)
+            response.raise_for_status()
+
+    start = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    return time.perf_counter() - start, latencies
+
+def report(name: str, elapsed: float, latencies: list[float]):
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2] * 1000
+    p99 = latencies[int(len(latencies) * 0.99)] * 1000
+    print(f"{name:<28} {len(latencies) / elapsed:>9.0f} req/s   p50 {p50:.3f} ms   p99 {p99:.3f} ms")
+
+def bench_decode(count: int):
+    bearer = token.create_access_token({"sub": "1"})
+    token.token_cache.clear()
+    start = time.perf_counter()
+    for _ in range(count):
+        token.token_cache.pop(bearer)
+        token.verify_token(bearer)
+    uncached = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(count):
+        token.verify_token(bearer)
+    cached = time.perf_counter() - start
+    print(f"verify_token ({token._jwt.__name__})  uncached {uncached / count * 1e6:.1f} us   cached {cached / count * 1e6:.2f} us")
+
+async def main():
+    parser = argparse.ArgumentParser(description="Measure the cost of authenticating requests")
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--users", type=int, default=100, help="distinct tokens in the warm-cache run")
+    args = parser.parse_args()
+
+    bench_decode(args.requests)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        # Every request carries a token never seen before, so each one is fully verified
+        fresh = [token.create_access_token({"sub": str(i)}) for i in range(args.requests)]
+        token.token_cache.clear()
+        report("distinct tokens (cold)", *await run_requests(client, fresh, args.concurrency))
+
+        # A realistic mix: a few users each sending many requests with the same token
+        users = [token.create_access_token({"sub": str(i)}) for i in range(args.users)]
+        repeated = [users[i % len(users)] for i in range(args.requests)]
+        token.token_cache.clear()
+        report("repeated tokens (cached)", *await run_requests(client, repeated, args.concurrency))
+    print(f"token cache: {token.get_token_cache_stats()}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
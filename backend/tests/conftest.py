@@ -0,0 +1,6 @@
+import os
+
+# Settings refuse to load without these; the tests never call the real APIs
+os.environ.setdefault("JWT_SECRET", "test-secret")
+os.environ.setdefault("GEMINI_API_KEY", "test-gemini-key")
+os.environ.setdefault("YOUTUBE_API_KEY", "test-youtube-key")
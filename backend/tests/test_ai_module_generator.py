@@ -0,0 +1,73 @@
+import asyncio
+import pytest
+from fastapi.testclient import TestClient
+from app.config.database import get_db
+from app.config.settings import settings
+from app.main import app
+from app.routes.dependencies import get_current_user
+from app.services import ai_module_generator
+from app.services.ai_module_generator import TooManyChunks, generate_module_with_gemini
+
+LONG_TEXT = "A sentence about cells. " * 2000
+
+class FakeSession:
+    async def close(self):
+        pass
+
+@pytest.fixture
+def no_gemini(monkeypatch):
+    calls = []
+
+    async def fake_generate_text(prompt: str) -> str:
+        calls.append(prompt)
+        raise AssertionError("Gemini must not be called")
+
+    monkeypatch.setattr(ai_module_generator, "_generate_text", fake_generate_text)
+    return calls
+
+def test_chunk_limit_raises_before_calling_gemini(monkeypatch, no_gemini):
+    monkeypatch.setattr(settings, "GENERATION_MAX_CHUNKS", 3)
+    with pytest.raises(TooManyChunks):
+        asyncio.run(generate_module_with_gemini(LONG_TEXT, chunked=True, chunk_tokens=200))
+    assert no_gemini == []
+
+def test_chunk_limit_is_a_client_error(monkeypatch, no_gemini):
+    monkeypatch.setattr(settings, "GENERATION_MAX_CHUNKS", 3)
+    monkeypatch.setattr(settings, "GENERATION_CACHE_ENABLED", False)
+
+    async def fake_db():
+        yield FakeSession()
+
+    app.dependency_overrides[get_current_user] = lambda: "1"
+    app.dependency_overrides[get_db] = fake_db
+    try:
+        response = TestClient(app).post("/modules/generate-ai", json={"extracted_text": LONG_TEXT, "chunked": True, "chunk_tokens": 200})
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 400
+    assert "limit of 3" in response.json()["detail"]
+
+def test_failed_chunk_cancels_the_other_calls(monkeypatch):
+    cancelled = []
+
+    async def fake_generate_text(prompt: str) -> str:
+        if "part 1 of" in prompt:
+            raise ValueError("Invalid response from Gemini API")
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(prompt)
+            raise
+        return "summary"
+
+    monkeypatch.setattr(ai_module_generator, "_generate_text", fake_generate_text)
+
+    async def run():
+        with pytest.raises(ValueError):
+            await ai_module_generator._summarize_chunks(["one", "two", "three"], max_parallel=3)
+        # Let the cancellations land
+        await asyncio.sleep(0)
+
+    asyncio.run(run())
+    assert len(cancelled) == 2